@@ -0,0 +1,211 @@
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import timeit
+
+import arkInit
+arkInit.init()
+
+import cOS
+
+import benchmark_paths
+
+
+# Tree
+##################################################
+def touch(path):
+	open(path, 'w').close()
+
+def createTree(root, sequences=4, shots=10, frames=10000, shotFrames=100, versions=50):
+	'''
+	Builds a production shaped show tree under root:
+
+	show/seq###/shot###/render/v001/beauty.####.exr
+	show/seq###/shot###/maya/shot_v####_abc.mb
+
+	The first shot gets the long sequence (frames),
+	the rest get shotFrames each.  Returns a dict
+	of the interesting paths for the benchmarks.
+	'''
+	show = cOS.normalizeDir(os.path.join(root, 'show'))
+	heroShot = None
+	for seq in range(sequences):
+		for shot in range(shots):
+			shotDir = show + 'seq%03d/shot%03d/' % (seq, shot)
+			renderDir = shotDir + 'render/v001/'
+			mayaDir = shotDir + 'maya/'
+			os.makedirs(renderDir)
+			os.makedirs(mayaDir)
+
+			count = shotFrames
+			if heroShot is None:
+				heroShot = shotDir
+				count = frames
+			for frame in xrange(1001, 1001 + count):
+				touch(renderDir + 'beauty.%04d.exr' % frame)
+
+			for version in range(1, versions + 1):
+				touch(mayaDir + 'shot_v%04d_abc.mb' % version)
+			touch(mayaDir + 'Notes.TXT')
+
+	return {
+		'show': show,
+		'heroShot': heroShot,
+		'heroRender': heroShot + 'render/v001/',
+		'heroSequence': heroShot + 'render/v001/beauty.%04d.exr',
+		'heroMaya': heroShot + 'maya/',
+	}
+
+
+# Timing
+##################################################
+def bestOf(func, repeat):
+	'''
+	Returns the fastest of repeat calls to func, in seconds,
+	and what the last call returned
+	'''
+	timer = timeit.default_timer
+	best = None
+	result = None
+	for i in range(repeat):
+		start = timer()
+		result = func()
+		elapsed = timer() - start
+		if best is None or elapsed < best:
+			best = elapsed
+	return best, result
+
+def getBenchmarks(paths):
+	'''
+	Returns a list of (name, func) to time, every func
+	should find something in the tree
+	'''
+	heroFiles = cOS.getFiles(paths['heroRender'], filesOnly=True)
+	caseInsensitivePath = paths['heroMaya'].upper() + 'notes.txt'
+	return [
+		('getFiles.show',
+			lambda: cOS.getFiles(paths['show'])),
+		('getFiles.show.filtered',
+			lambda: cOS.getFiles(paths['show'],
+				fileIncludes=['*.mb'],
+				folderExcludes=['render'],
+				filesOnly=True)),
+		('getFiles.show.parallel',
+			lambda: cOS.getFiles(paths['show'], parallel=True)),
+		('collectFiles.show',
+			lambda: cOS.collectFiles(paths['show'], ['exr', 'mb'], [])),
+		('collapseFiles.heroSequence',
+			lambda: cOS.collapseFiles(list(heroFiles))),
+		('getFrameRange.heroSequence',
+			lambda: cOS.getFrameRange(paths['heroSequence'])),
+		('getHighestVersionFilePath.heroMaya',
+			lambda: cOS.getHighestVersionFilePath(
+				paths['heroMaya'], 'shot_v0001_abc', 'mb')),
+		('VersionIndex.heroMaya',
+			lambda: cOS.VersionIndex(paths['heroMaya']).getHighestVersionFilePath(
+				'shot_v0001_abc', 'mb')),
+		('findCaseInsensitiveFilename.heroMaya',
+			lambda: cOS.findCaseInsensitiveFilename(caseInsensitivePath)),
+	]
+
+def getRevision():
+	'''
+	Returns the git revision being benchmarked, or None
+	'''
+	try:
+		return subprocess.check_output(
+			['git', 'rev-parse', 'HEAD'],
+			cwd=os.path.dirname(os.path.realpath(__file__)),
+			stderr=subprocess.STDOUT).strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+# Main
+##################################################
+def main():
+	parser = argparse.ArgumentParser(
+		description='Times cOS against a synthetic show tree')
+	parser.add_argument('--root',
+		help='build the tree in this empty dir instead of a temp dir')
+	parser.add_argument('--sequences', type=int, default=4)
+	parser.add_argument('--shots', type=int, default=10)
+	parser.add_argument('--frames', type=int, default=10000)
+	parser.add_argument('--shotFrames', type=int, default=100)
+	parser.add_argument('--versions', type=int, default=50)
+	parser.add_argument('--repeat', type=int, default=3)
+	parser.add_argument('--number', type=int, default=100000,
+		help='calls per path normalizer timing')
+	parser.add_argument('--output',
+		help='write the json results here instead of stdout')
+	parser.add_argument('--keep', action='store_true',
+		help="don't delete the tree afterwards")
+	args = parser.parse_args()
+
+	root = args.root or tempfile.mkdtemp(prefix='cOSBenchmark_')
+	config = {
+		'sequences': args.sequences,
+		'shots': args.shots,
+		'frames': args.frames,
+		'shotFrames': args.shotFrames,
+		'versions': args.versions,
+		'repeat': args.repeat,
+		'number': args.number,
+	}
+
+	try:
+		sys.stderr.write('building tree in %s\n' % root)
+		paths = createTree(root,
+			sequences=args.sequences,
+			shots=args.shots,
+			frames=args.frames,
+			shotFrames=args.shotFrames,
+			versions=args.versions)
+
+		results = []
+		for name, func in getBenchmarks(paths):
+			seconds, found = bestOf(func, args.repeat)
+			# an empty result means the benchmark
+			# timed a no-op, not the code path
+			if not found:
+				raise RuntimeError('%s found nothing' % name)
+			sys.stderr.write('%-40s %10.4f sec\n' % (name, seconds))
+			result = {
+				'name': name,
+				'seconds': seconds,
+				'repeat': args.repeat,
+			}
+			if isinstance(found, list):
+				result['count'] = len(found)
+			results.append(result)
+
+		for result in benchmark_paths.run(args.number):
+			sys.stderr.write('%-40s %10.3f usec\n' %
+				(result['name'], result['usec']))
+			results.append(result)
+	finally:
+		if not args.keep and not args.root:
+			shutil.rmtree(root, ignore_errors=True)
+
+	report = {
+		'revision': getRevision(),
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'config': config,
+		'results': results,
+	}
+	output = json.dumps(report, indent=2, sort_keys=True)
+	if args.output:
+		with open(args.output, 'w') as f:
+			f.write(output + '\n')
+	else:
+		print output
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,56 @@
+
+import timeit
+
+import arkInit
+arkInit.init()
+
+import cOS
+
+
+# Paths
+##################################################
+paths = {
+	'normalized': 'r:/show/seq/shot/render/v001/frame.1001.exr',
+	'normalizedDir': 'r:/show/seq/shot/render/v001/',
+	'url': 'http://server/show/seq/shot/frame.1001.exr',
+	'backslashes': 'R:\\show\\seq\\shot\\render\\v001\\frame.1001.exr',
+	'doubleSlashes': 'r:/show//seq/shot//render/v001/frame.1001.exr',
+}
+
+functions = [
+	cOS.unixPath,
+	cOS.normalizePath,
+	cOS.ensureEndingSlash,
+]
+
+
+# Benchmark
+##################################################
+def timePath(func, path, number):
+	'''
+	Returns the average time of func(path) in microseconds
+	'''
+	seconds = timeit.timeit(lambda: func(path), number=number)
+	return seconds / number * 1000000.0
+
+def run(number=100000):
+	'''
+	Times each path function against each kind of path,
+	returns a list of result dicts
+	'''
+	results = []
+	for func in functions:
+		for label in sorted(paths.keys()):
+			results.append({
+				'name': func.__name__ + '.' + label,
+				'usec': timePath(func, paths[label], number),
+				'number': number,
+			})
+	return results
+
+def main():
+	for result in run():
+		print '%-36s %8.3f usec' % (result['name'], result['usec'])
+
+if __name__ == '__main__':
+	main()
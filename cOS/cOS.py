@@ -2,11 +2,18 @@ import os
 import time
 import sys
 import subprocess
-import glob
 import collections
+import array
+import bisect
+import heapq
+import struct
+import errno
+import hashlib
+import stat
+import tempfile
 import shutil
-from distutils import dir_util
 import re
+import select
 import fnmatch
 import Queue
 import threading
@@ -28,6 +35,52 @@ try:
 except:
 	pass
 
+# scandir is built in from python 3.5, otherwise try the
+# scandir backport (pip install scandir).  Without it python 2
+# falls back to listdir and a stat per entry to tell files from
+# folders, so getFiles and friends are no faster than os.walk
+try:
+	from os import scandir as _osScandir
+except ImportError:
+	try:
+		from scandir import scandir as _osScandir
+	except ImportError:
+		_osScandir = None
+
+# Regexes
+##################################################
+# compiled once here rather than on every call
+
+# frame padding tokens, ex: ####, $F4, %04d, 1001
+_hashPaddingRegex = re.compile(r'##+')
+_dollarPaddingRegex = re.compile(r'\$F[1-9]?')
+_printfPaddingRegex = re.compile(r'%[0-9]{0,2}d')
+_paddingDigitsRegex = re.compile(r'[0-9]{1,2}')
+_frameNumberRegex = re.compile(r'[0-9]+')
+
+# name.0001.ext, also catches two part extensions like .bgeo.sc
+_sequenceFileRegex = re.compile(r'^(.+)\.([0-9]+)\.([^.]+\.sc|[^.]+)$', re.I)
+# name_0001.ext or name.0001.ext
+_sequenceBaseNameRegex = re.compile(r'(.+)[_\.][0-9]+\.[a-z0-9]+$')
+_sequencePaddedBaseNameRegex = re.compile(r'(.+)[_\.]%[0-9]+d\.[a-z0-9]+$')
+_sequenceFrameNumberRegex = re.compile(r'.+[_\.]([0-9]+)\.[a-z0-9]+$')
+_frameRangeTextRegex = re.compile(r'^[a-zA-Z0-9._/:%]+ [0-9]+-[0-9]+$')
+# prefix.0001.suffix with any number of dots on either side
+_collapseFrameRegex = re.compile(r'^(.*\.)([0-9]+)(\.[^/\\]+)$')
+
+# versions and initials, ex: name_v0001_abc.ext
+_versionRegex = re.compile(r'[vV]([0-9]+)')
+_versionInitialsRegex = re.compile(r'_[vV][0-9]{3,4}_([a-z]{3})?')
+_versionUserRegex = re.compile(r'_v[0-9]{4}(_[a-z]{3})?')
+_versionWithInitialsRegex = re.compile(r'_[vV][0-9]+_[a-z]{3}\.')
+_versionWithoutInitialsRegex = re.compile(r'_[vV][0-9]+')
+_initialsNoVersionRegex = re.compile(r'_[a-z]{3}\.([a-z0-9]+)$')
+# name_v0001_abc without the extension, for VersionIndex
+_versionedNameRegex = re.compile(r'^(.+)_[vV]([0-9]+)(?:_([a-z]{3}))?$')
+
+# successive slashes, ex: \\ or \/
+_slashesRegex = re.compile(r'[\\/]+')
+
 # Helpers
 ##################################################
 def ensureArray(val):
@@ -91,7 +144,18 @@ def unixPath(path):
 	'''
 	Changes backslashes to forward slashes and
 	removes successive slashes, ex \\ or \/
+
+	Paths that are already normalized are returned as is.
 	'''
+	# fast path: no backslashes, no upper case drive letter
+	# and no doubled slashes besides a url's ://
+	if '\\' not in path and \
+		(path[1:2] != ':' or path[0] == path[0].lower()):
+		if '//' not in path:
+			return path
+		if path.count('//') == path.count('://') and '///' not in path:
+			return path
+
 	# lower case drive leters
 	if len(path) > 1 and path[1] == ':':
 		path = path[0].lower() + path[1:]
@@ -101,10 +165,96 @@ def unixPath(path):
 	# so we split on that, replace the slashes in the parts
 	# then join it all back together
 	parts = path.split('://')
-	replaced = [re.sub(r'[\\/]+', '/', p) for p in parts]
+	replaced = [_slashesRegex.sub('/', p) for p in parts]
 	return '://'.join(replaced)
 
 
+# batch versions of the above for large lists of paths,
+# they join the whole batch into one string and normalize it in
+# a handful of C-level passes instead of a function call per path
+_batchSeparator = '\n'
+# stands in for :// while slashes are collapsed
+_urlPlaceholder = '\x00'
+# upper case drive letter at the start of a path in the batch,
+# the literal prefix keeps the search fast
+_batchDriveRegex = re.compile(r'\n[A-Z]:')
+
+def _lowerMatch(match):
+	return match.group().lower()
+
+def _isNumpyArray(paths):
+	# only check if numpy is already loaded,
+	# otherwise paths can't be an array
+	numpy = sys.modules.get('numpy')
+	return numpy is not None and isinstance(paths, numpy.ndarray)
+
+def _unixPathBatch(paths):
+	if not paths:
+		return []
+
+	# mixed str / unicode would get coerced by join
+	if len(set(map(type, paths))) != 1:
+		return [unixPath(p) for p in paths]
+
+	separator = type(paths[0])(_batchSeparator)
+	joined = separator.join(paths)
+	if joined.count(separator) != len(paths) - 1 or \
+		_urlPlaceholder in joined:
+		return [unixPath(p) for p in paths]
+
+	# fast path, nothing to do for the whole batch
+	joined = separator + joined
+	hasBackslashes = '\\' in joined
+	if not hasBackslashes and \
+		'//' not in joined and \
+		not _batchDriveRegex.search(joined):
+		return list(paths)
+
+	# lower case drive leters
+	joined = _batchDriveRegex.sub(_lowerMatch, joined)
+
+	# keep :// for urls, collapse every other run of slashes
+	joined = joined.replace('://', _urlPlaceholder)
+	if hasBackslashes:
+		joined = joined.replace('\\', '/')
+	while '//' in joined:
+		joined = joined.replace('//', '/')
+	joined = joined.replace(_urlPlaceholder, '://')
+	return joined[1:].split(separator)
+
+def unixPaths(paths):
+	'''
+	unixPath for a whole list of paths at once.
+
+	Accepts any iterable of strings or a NumPy string array and
+	returns a list, or an array when given an array.
+	'''
+	if _isNumpyArray(paths):
+		import numpy
+		return numpy.array(_unixPathBatch(paths.tolist()))
+	return _unixPathBatch(list(paths))
+
+def normalizePaths(paths):
+	'''
+	normalizePath for a whole list of paths, see unixPaths.
+	'''
+	return unixPaths(paths)
+
+def normalizeDirs(paths):
+	'''
+	normalizeDir for a whole list of paths, see unixPaths.
+	'''
+	isArray = _isNumpyArray(paths)
+	if isArray:
+		paths = paths.tolist()
+	paths = [p if p[-1:] == '/' else p + '/'
+		for p in _unixPathBatch(list(paths))]
+	if isArray:
+		import numpy
+		return numpy.array(paths)
+	return paths
+
+
 # Extensions
 ##################################################
 
@@ -156,8 +306,7 @@ def ensureExtension(filename, extension):
 ##################################################
 
 def getInitials(filename):
-	versionUserRegEx = re.compile(r'_[vV][0-9]{3,4}_([a-z]{3})?')
-	versionUserSearch = versionUserRegEx.search(filename)
+	versionUserSearch = _versionInitialsRegex.search(filename)
 	if versionUserSearch:
 		return versionUserSearch.group(1)
 	return None
@@ -181,7 +330,7 @@ def getVersion(filename):
 	except:
 		pass
 
-	match = re.findall('[vV]([0-9]+)', filename)
+	match = _versionRegex.findall(filename)
 	if (match):
 		return int(match[-1])
 	return None
@@ -191,28 +340,25 @@ def incrementVersion(filename, initials=''):
 	Increments a file's version number
 	'''
 	version = getVersion(filename) + 1
-	# _v0001_abc.
-	withInitials = r'_[vV][0-9]+_[a-z]{3}\.'
-	# _v0001
-	withoutInitials = r'_[vV][0-9]+'
-	# _abc.ext
-	noVersion = r'_[a-z]{3}\.([a-z0-9]+)$'
 
 	if len(initials):
-		if not re.search(withInitials, filename):
-			m = re.search(noVersion, filename)
+		# _v0001_abc.
+		if not _versionWithInitialsRegex.search(filename):
+			# _abc.ext
+			m = _initialsNoVersionRegex.search(filename)
 			if not m:
 				raise Exception('Filename version and initials do not match expected format.')
 
 			# A_abc.ext -> A_v0001_xyz.ext
-			return re.sub(noVersion, '_v0001_%s.%s' % (initials, m.group(1)), filename)
+			return _initialsNoVersionRegex.sub('_v0001_%s.%s' % (initials, m.group(1)), filename)
 
 		# A_v0001_abc.ext -> A_v0002_xyz.ext
-		return re.sub(withInitials, '_v%04d_%s.' % (version, initials), filename)
+		return _versionWithInitialsRegex.sub('_v%04d_%s.' % (version, initials), filename)
 
 	else:
+		# _v0001
 		# A_v0001_abc.ext -> A_v0002_abc.ext
-		return re.sub(withoutInitials, '_v%04d' % version, filename)
+		return _versionWithoutInitialsRegex.sub('_v%04d' % version, filename)
 
 def getHighestVersionFilePath(root, name=None, extension=''):
 	'''
@@ -226,34 +372,34 @@ def getHighestVersionFilePath(root, name=None, extension=''):
 	root = normalizeDir(root)
 	highestVersion = -99999999
 	path = False
-	if not name:
-		for f in glob.iglob(root + '*' + extension):
-			# keeps .nk~ etc from showing up
-			if not f.endswith(extension):
-				continue
-
-			fileVersion = getVersion(f)
-			if fileVersion > highestVersion:
-				path = unixPath(f)
-				highestVersion = fileVersion
+	if not os.path.isdir(root):
+		return path
 
-	else:
-		# regex for checking and getting user info if it exists d version info
-		versionUserRegEx = re.compile('_v[0-9]{4}(_[a-z]{3})?')
+	onlyName = ''
+	if name:
+		# checking and getting user info if it exists d version info
 		versionUser = ''
-		if versionUserRegEx.search(name):
-			versionUser = versionUserRegEx.search(name).group()
+		versionUserSearch = _versionUserRegex.search(name)
+		if versionUserSearch:
+			versionUser = versionUserSearch.group()
 
 		onlyName = name.replace(versionUser, '')
-		for f in glob.iglob(root + onlyName + '*' + extension):
-			# keeps .nk~ etc from showing up
-			if not f.endswith(extension):
-				continue
 
-			fileVersion = getVersion(f)
-			if fileVersion > highestVersion:
-				path = unixPath(f)
-				highestVersion = fileVersion
+	for f in iterGetFiles(root,
+			fileIncludes=[root + onlyName + '*' + extension],
+			depth=0,
+			filesOnly=True):
+		# keeps .nk~ etc from showing up
+		if not f.endswith(extension):
+			continue
+		# skip hidden files, same as glob
+		if f[len(root):].startswith('.'):
+			continue
+
+		fileVersion = getVersion(f)
+		if fileVersion > highestVersion:
+			path = f
+			highestVersion = fileVersion
 
 	return path
 
@@ -264,6 +410,182 @@ def createVersionedFilename(filename, version, padding=4, extension=''):
 	'''
 	return filename + '_v' + str(version).zfill(padding) + '.' + extension
 
+class VersionedFile(object):
+	'''
+	A single name_v0001_abc.ext file found by VersionIndex.
+	'''
+	__slots__ = ('path', 'name', 'initials', 'version', 'extension')
+
+	def __init__(self, path, name, initials, version, extension):
+		self.path = path
+		self.name = name
+		self.initials = initials
+		self.version = version
+		self.extension = extension
+
+	def __repr__(self):
+		return '<VersionedFile %s>' % self.path
+
+class VersionIndex(object):
+	'''
+	Scans a directory once and parses every name_v0001_abc.ext
+	file into name, initials, version and extension, so version
+	queries for any name in it are just dictionary lookups.
+
+	Names can be given with or without their version,
+	ex: shot or shot_v0003_abc
+
+	Parameters:
+		path - directory to scan
+	'''
+	# scans taken this close to the directory's mtime aren't
+	# trusted, a change in the same mtime tick wouldn't show up
+	racyWindow = 2.0
+
+	def __init__(self, path):
+		self.path = normalizeDir(path)
+		self.mtime = None
+		self.scannedAt = None
+		self.versions = {}
+		self.scan()
+
+	def __len__(self):
+		return len(self.versions)
+
+	def _key(self, name, extension):
+		match = _versionedNameRegex.match(name)
+		if match:
+			name = match.group(1)
+		return (name, self._extensionKey(extension))
+
+	@staticmethod
+	def _extensionKey(extension):
+		return (extension or '').strip().lower().lstrip('.')
+
+	def scan(self):
+		'''
+		(Re)scans the directory, rebuilding every version list.
+		'''
+		try:
+			self.mtime = os.stat(self.path).st_mtime
+		except OSError:
+			self.mtime = None
+		self.scannedAt = time.time()
+
+		# (name, extension) -> [VersionedFile] sorted by version
+		self.versions = {}
+		if self.mtime is None:
+			return
+
+		for entry in _scanDir(self.path):
+			# skip hidden files, same as glob
+			if entry.name.startswith('.') or _isDirEntry(entry):
+				continue
+			stem, dot, extension = entry.name.rpartition('.')
+			if not dot:
+				stem = entry.name
+			match = _versionedNameRegex.match(stem)
+			if not match:
+				continue
+			name, version, initials = match.groups()
+			versionedFile = VersionedFile(self.path + entry.name,
+				name, initials, int(version), extension)
+			self.versions.setdefault(
+				(name, self._extensionKey(extension)), []).append(versionedFile)
+
+		for versionedFiles in self.versions.itervalues():
+			versionedFiles.sort(key=lambda f: (f.version, f.path))
+
+	def refresh(self):
+		'''
+		Rescans only if the directory's mtime has changed,
+		returns True if it did.
+		'''
+		try:
+			mtime = os.stat(self.path).st_mtime
+		except OSError:
+			mtime = None
+		if mtime == self.mtime and mtime is not None and \
+			self.scannedAt - mtime > self.racyWindow:
+			return False
+		self.scan()
+		return True
+
+	def getVersions(self, name, extension=''):
+		'''
+		Returns every VersionedFile for name, lowest version first.
+		'''
+		return list(self.versions.get(self._key(name, extension), []))
+
+	def getHighestVersion(self, name, extension=''):
+		'''
+		Returns the VersionedFile with the highest version, or None.
+		'''
+		versionedFiles = self.versions.get(self._key(name, extension))
+		if not versionedFiles:
+			return None
+		return versionedFiles[-1]
+
+	def getHighestVersionFilePath(self, name, extension=''):
+		'''
+		Returns the path of the highest version, or False
+		like getHighestVersionFilePath.
+		'''
+		versionedFile = self.getHighestVersion(name, extension)
+		if not versionedFile:
+			return False
+		return versionedFile.path
+
+	def getNextVersion(self, name, extension=''):
+		'''
+		Returns the version after the highest, 1 if there are none.
+		'''
+		versionedFile = self.getHighestVersion(name, extension)
+		if not versionedFile:
+			return 1
+		return versionedFile.version + 1
+
+def reserveNextVersion(root, name, extension, padding=4, maxAttempts=1000):
+	'''
+	Claims the next free version of name in root by creating an
+	empty name_v0001.ext with O_CREAT | O_EXCL, so concurrent
+	publishers never get the same file.  Returns the reserved path.
+
+	root is scanned once for the starting version, after that a
+	collision just tries the next version up, no rescan.
+
+	Parameters:
+		root - directory to publish into
+		name - name with or without its version, ex: shot or shot_v0003
+		extension - ex: mb or .mb
+		padding - digits in the version number
+		maxAttempts - versions to try before giving up
+	'''
+	root = normalizeDir(root)
+	match = _versionedNameRegex.match(name)
+	if match:
+		name = match.group(1)
+	extension = extension.strip().lstrip('.')
+	if extension:
+		extension = '.' + extension
+
+	flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY
+	version = VersionIndex(root).getNextVersion(name, extension)
+	for i in xrange(maxAttempts):
+		path = root + name + '_v' + str(version).zfill(padding) + extension
+		try:
+			fd = os.open(path, flags, 0666)
+		except OSError as err:
+			if err.errno != errno.EEXIST:
+				raise
+			version += 1
+			continue
+		os.close(fd)
+		return path
+
+	raise Exception('Could not reserve a version of %s%s after %d attempts' %
+		(root + name, extension, maxAttempts))
+
 # Information
 ##################################################
 
@@ -283,11 +605,205 @@ def upADir(path):
 		return path
 	return '/'.join(parts[:-2]) + '/'
 
-def getPathInfo(path, options={}):
+class PathInfo(object):
+	'''
+	Lightweight, read-only version of the getPathInfo dictionary.
+	Each field is only worked out the first time it's read, and it
+	still supports dict-style access, ex: info['basename']
+
+	Use toDict() for a plain, editable dictionary.
+	'''
+	__slots__ = (
+		'_rawPath',
+		'_path',
+		'_dirname',
+		'_basename',
+		'_extension',
+		'_name',
+		'_filebase',
+		'_root',
+	)
+	fields = ('path', 'dirname', 'basename', 'extension', 'name', 'filebase', 'root')
+
+	def __init__(self, path):
+		self._rawPath = path
+		self._path = None
+		self._dirname = None
+		self._basename = None
+		self._extension = None
+		self._name = None
+		self._filebase = None
+		self._root = None
+
+	def __repr__(self):
+		return '<PathInfo %r>' % self.path
+
+	@property
+	def path(self):
+		if self._path is None:
+			self._path = normalizePath(self._rawPath)
+		return self._path
+
+	@property
+	def dirname(self):
+		if self._dirname is None:
+			self._splitPath()
+		return self._dirname
+
+	@property
+	def basename(self):
+		if self._basename is None:
+			self._splitPath()
+		return self._basename
+
+	@property
+	def extension(self):
+		if self._extension is None:
+			extensionParts = self.basename.split('.')
+			extension = extensionParts[-1].strip().lower()
+			if extension == 'sc':
+				extension = '.'.join(extensionParts[-2:]).strip().lower()
+			self._extension = extension
+		return self._extension
+
+	@property
+	def name(self):
+		if self._name is None:
+			self._name = self.basename.replace('.' + self.extension, '')
+		return self._name
+
+	@property
+	def filebase(self):
+		if self._filebase is None:
+			self._filebase = self.path.replace('.' + self.extension, '')
+		return self._filebase
+
+	@property
+	def root(self):
+		if self._root is None:
+			pathParts = self.path.split('/', 2)
+			# for linux
+			if pathParts[0] == '':
+				self._root = '/' + pathParts[1] + '/'
+			# for windows
+			else:
+				self._root = pathParts[0] + '/'
+		return self._root
+
+	def _splitPath(self):
+		path = self.path
+		slash = path.rfind('/')
+		if slash == -1:
+			self._dirname = '/'
+		else:
+			self._dirname = path[:slash + 1]
+		self._basename = path[slash + 1:]
+
+	# dict-style access
+	def __getitem__(self, key):
+		if key not in self.fields:
+			raise KeyError(key)
+		return getattr(self, key)
+
+	def __contains__(self, key):
+		return key in self.fields
+
+	def __iter__(self):
+		return iter(self.fields)
+
+	def __len__(self):
+		return len(self.fields)
+
+	def get(self, key, default=None):
+		if key not in self.fields:
+			return default
+		return getattr(self, key)
+
+	def keys(self):
+		return list(self.fields)
+
+	def values(self):
+		return [getattr(self, key) for key in self.fields]
+
+	def items(self):
+		return [(key, getattr(self, key)) for key in self.fields]
+
+	def toDict(self):
+		'''
+		Returns the fields as a new, editable dictionary
+		'''
+		return dict(self.items())
+
+	def __eq__(self, other):
+		if isinstance(other, PathInfo):
+			return self.path == other.path
+		if isinstance(other, dict):
+			return self.toDict() == other
+		return NotImplemented
+
+	def __ne__(self, other):
+		equal = self.__eq__(other)
+		if equal is NotImplemented:
+			return equal
+		return not equal
+
+	def __lt__(self, other):
+		if isinstance(other, PathInfo):
+			return self.path < other.path
+		return NotImplemented
+
+	def __hash__(self):
+		return hash(self.path)
+
+class _GenerationalMemo(object):
+	'''
+	Bounded memo that approximates LRU with two generations.
+	Lookups hit the young generation first and promote from the
+	old one, when the young one fills up it becomes the old one
+	and everything not used since is dropped.  Plain dict speed,
+	no per-hit bookkeeping.
+	'''
+	def __init__(self, maxEntries):
+		self.maxEntries = maxEntries
+		self._young = {}
+		self._old = {}
+
+	def __len__(self):
+		return len(self._young) + len(self._old)
+
+	def get(self, key):
+		value = self._young.get(key)
+		if value is None:
+			value = self._old.get(key)
+			if value is not None:
+				self.put(key, value)
+		return value
+
+	def put(self, key, value):
+		if len(self._young) >= self.maxEntries // 2:
+			self._old = self._young
+			self._young = {}
+		self._young[key] = value
+
+	def clear(self):
+		self._young = {}
+		self._old = {}
+
+_pathInfoMemo = _GenerationalMemo(65536)
+
+def getPathInfo(path, options={}, copy=False):
 	'''
 	Returns object with file's basename, extension, name, dirname and path.
 	With options, can also return root, relative dirname, and relative path, and
 	make all fields lowercase.
+
+	Without options returns a memoized PathInfo, which reads like
+	the dictionary but is only computed as it's used.
+
+	Note: the PathInfo is shared and read-only, so code that used to
+	set keys on the result (info['x'] = ...) or json.dumps it needs
+	copy=True, which returns a plain dictionary like getPathInfo
+	always used to, or PathInfo.toDict().
 	'''
 	if not path or len(path) == 0:
 		return {
@@ -301,16 +817,15 @@ def getPathInfo(path, options={}):
 			'relativeDirname': '',
 			'relativePath': '',
 		}
-	pathInfo = {}
-	pathInfo['path'] = normalizePath(path)
-	pathParts = pathInfo['path'].split('/')
-	pathInfo['dirname'] = '/'.join(pathParts[:-1]) + '/'
-	pathInfo['basename'] = pathParts[-1]
-	pathInfo['extension'] = pathParts[-1].split('.')[-1].strip().lower()
-	if pathInfo['extension'] == 'sc':
-		pathInfo['extension'] = '.'.join(pathParts[-1].split('.')[-2:]).strip().lower()
-	pathInfo['name'] = pathInfo['basename'].replace('.' + pathInfo['extension'], '')
-	pathInfo['filebase'] = pathInfo['path'].replace('.' + pathInfo['extension'], '')
+
+	if not copy and not options.get('root') and not options.get('lowercaseNames'):
+		pathInfo = _pathInfoMemo.get(path)
+		if pathInfo is None:
+			pathInfo = PathInfo(path)
+			_pathInfoMemo.put(path, pathInfo)
+		return pathInfo
+
+	pathInfo = PathInfo(path).toDict()
 
 	# fix: relative path could be improved but it's a start
 	if options.get('root'):
@@ -318,18 +833,8 @@ def getPathInfo(path, options={}):
 		pathInfo['relativeDirname'] = './' + removeStartingSlash(normalizeDir(pathInfo['dirname'].replace(pathInfo['root'], '')))
 		pathInfo['relativePath'] = './' + removeStartingSlash(normalizePath(pathInfo['path'].replace(pathInfo['root'], '')))
 
-	else:
-		# for linux
-		if pathParts[0] == '':
-			pathInfo['root'] = '/' + pathParts[1] + '/'
-		# for windows
-		else:
-			pathInfo['root'] = pathParts[0] + '/'
-
 	if options.get('lowercaseNames'):
-		# uncomment in Sublime 3
-		# pathInfo = {x: x.lower() for x in pathInfo}
-		pathInfo = dict([(x, x.lower()) for x in pathInfo])
+		pathInfo = dict([(k, v.lower()) for k, v in pathInfo.items()])
 
 	return pathInfo
 
@@ -339,41 +844,57 @@ def getPathInfo(path, options={}):
 # will match
 # text/frame.tacos.bananas.%04d.exr
 # cuz getFiles needs to take a regex
-def getFrameRange(path):
+def getFrameRange(path, index=None):
 	'''
 	Returns a dictionary with min, max, duration,
 	base, ext, and complete
 
 	Parameters:
 		path - Generic file in sequence. Ex. text/frame.%04d.exr
+		index - optional SequenceIndex to answer from
+			instead of listing the directory
 	'''
-	if not isValidSequence(path):
+	frameInfo = parseFramePath(path)
+	if not frameInfo['isSequence']:
 		print 'Not a valid sequence'
 		return None
 
-	path = normalizeFramePadding(path)
-
-	padding = getPadding(path)
+	if index is not None:
+		return index.getFrameRange(path)
 
-	pathInfo = getPathInfo(path)
-	extension = pathInfo['extension']
-	seqDir = pathInfo['dirname']
-	seqName = '.'.join(pathInfo['name'].split('.')[:-1])
+	path = _normalizeFramePadding(path, frameInfo)
+	padding = frameInfo['padding']
+	extension = frameInfo['extension']
+	seqDir = getPathInfo(path)['dirname']
+	seqName = frameInfo['base']
 
-	digitsPadding = '\.\d+\.'
-	files = getFiles(seqDir,
-				fileIncludes=[seqName + digitsPadding + extension], depth=0, filesOnly=True, regex=True)
-	if not len(files):
+	if not os.path.isdir(seqDir):
 		return None
 
-	files.sort()
-	firstFileInfo = getPathInfo(files[0])
-
-	try:
-		minFrame = int(firstFileInfo['name'].split('.')[-1])
-		maxFrame = int(getPathInfo(files[-1])['name'].split('.')[-1])
-
-	except:
+	# stream the matches and keep a running min / max
+	# rather than collecting and sorting every frame,
+	# names can hold regex characters, ex: shot (v2).1001.exr
+	framePattern = re.escape(seqName) + r'\.(\d+)\.' + re.escape(extension) + '$'
+	frameRegex = re.compile(framePattern)
+	minFrame = maxFrame = None
+	firstFile = None
+	count = 0
+	for entry in iterGetFiles(seqDir,
+			fileIncludes=[framePattern],
+			depth=0,
+			filesOnly=True,
+			regex=True,
+			entries=True):
+		match = frameRegex.match(entry.name) or frameRegex.match(entry.path)
+		frame = int(match.group(1))
+		if minFrame is None or frame < minFrame:
+			minFrame = frame
+			firstFile = entry.path
+		if maxFrame is None or frame > maxFrame:
+			maxFrame = frame
+		count += 1
+
+	if not count:
 		return None
 
 	if padding == 0:
@@ -383,12 +904,11 @@ def getFrameRange(path):
 		paddingString = '%0' + str(padding) + 'd'
 
 	duration = maxFrame - minFrame + 1
-	count = len(files)
 	return {
 			'min': minFrame,
 			'max': maxFrame,
 			'duration': duration,
-			'base': firstFileInfo['dirname'] + firstFileInfo['name'],
+			'base': firstFile[:-len(extension) - 1],
 			'baseUnpadded': seqName,
 			'extension': extension,
 			'complete': duration == count,
@@ -399,83 +919,103 @@ def getFrameRange(path):
 			'paddedPath': seqDir + seqName + '.' + paddingString + '.' + extension,
 		}
 
-# copy of arkUtil's get padding, it does not throw an error,
-# but returns 0 if padding is 0
-# To Do: use this in place of arkUtil getPadding soon!
-def getPadding(filepath):
-	pathInfo = getPathInfo(filepath)
-	fName = pathInfo['name']
-
-	hashReg = re.compile('##+')
-	dollarReg = re.compile('\$F[1-9]?')
-	frameReg = re.compile('%[0-9]{0,2}d')
-	frameNumberReg = re.compile('[0-9]+')
+def parseFramePath(path):
+	'''
+	Splits a sequence path in one pass, ex: dir/frame.1001.exr
+	or dir/frame.%04d.exr
+
+	Returns a dictionary with:
+		dirname - everything up to and including the last slash
+		base - filename before the frame token, ex: frame
+		frameText - the frame token, ex: 1001, %04d, ####, $F4, or None
+		frame - frame number if frameText is a number, otherwise None
+		padding - same as getPadding
+		extension - lowercase, ex: exr or bgeo.sc
+		isSequence - same as isValidSequence
+	'''
+	slash = max(path.rfind('/'), path.rfind('\\'))
+	dirname = path[:slash + 1]
+	basename = path[slash + 1:]
+
+	# get the extension the same way getPathInfo does
+	nameParts = basename.split('.')
+	extensionParts = 1
+	if len(nameParts) > 2 and nameParts[-1].strip().lower() == 'sc':
+		extensionParts = 2
+	if len(nameParts) > extensionParts:
+		extension = '.'.join(nameParts[-extensionParts:]).strip().lower()
+		nameParts = nameParts[:-extensionParts]
+	else:
+		extension = ''
+
+	info = {
+		'dirname': dirname,
+		'base': '.'.join(nameParts),
+		'frameText': None,
+		'frame': None,
+		'padding': 0,
+		'extension': extension,
+		'isSequence': False,
+	}
 
 	# if the name is only numbers or only frame padding
-	nameParts = fName.split('.')
 	if len(nameParts) < 2:
-		return 0
+		return info
 
 	# gets position of frame padding
-	framePadding = fName.split('.')[-1]
-
-	if hashReg.match(framePadding):
-		padding = framePadding.count('#')
-
-	elif dollarReg.match(framePadding):
-		padding = framePadding[-1]
-		if padding == 'F':
-			return 0
+	framePadding = nameParts[-1]
+	info['base'] = '.'.join(nameParts[:-1])
+	info['frameText'] = framePadding
 
-	elif frameReg.match(framePadding):
-		paddingReg = re.compile('[0-9]{1,2}')
-		if paddingReg.search(framePadding):
-			padding = paddingReg.search(framePadding).group()
+	if _hashPaddingRegex.match(framePadding):
+		info['padding'] = framePadding.count('#')
 
-		else:
-			return 0
+	elif _dollarPaddingRegex.match(framePadding):
+		if framePadding[-1].isdigit():
+			info['padding'] = int(framePadding[-1])
 
+	elif _printfPaddingRegex.match(framePadding):
+		paddingSearch = _paddingDigitsRegex.search(framePadding)
+		if paddingSearch:
+			info['padding'] = int(paddingSearch.group())
 
-	elif frameNumberReg.match(framePadding):
-		padding = len(framePadding)
-		if padding <= 2:
-			return 0
+	elif _frameNumberRegex.match(framePadding):
+		if framePadding.isdigit():
+			info['frame'] = int(framePadding)
+		if len(framePadding) > 2:
+			info['padding'] = len(framePadding)
 
 	else:
-		return 0
+		return info
 
-	return int(padding)
+	info['isSequence'] = True
+	return info
 
-def normalizeFramePadding(filepath):
-	pathInfo = getPathInfo(filepath)
-	fName = pathInfo['name']
+# copy of arkUtil's get padding, it does not throw an error,
+# but returns 0 if padding is 0
+# To Do: use this in place of arkUtil getPadding soon!
+def getPadding(filepath):
+	return parseFramePath(filepath)['padding']
 
-	hashReg = re.compile('##+')
-	dollarReg = re.compile('\$F[1-9]?')
-	frameNumberReg = re.compile('[0-9]+')
+def normalizeFramePadding(filepath):
+	return _normalizeFramePadding(filepath, parseFramePath(filepath))
 
+def _normalizeFramePadding(filepath, frameInfo):
+	framePadding = frameInfo['frameText']
 	# if the name is only numbers or only frame padding
-	nameParts = fName.split('.')
-	if len(nameParts) < 2:
+	if framePadding is None:
 		return filepath
 
-	# gets position of frame padding
-	framePadding = fName.split('.')[-1]
-
-	if hashReg.match(framePadding):
+	if _hashPaddingRegex.match(framePadding):
 		padding = framePadding.count('#')
 
-	elif dollarReg.match(framePadding):
-		padding = framePadding[-1]
+	elif _dollarPaddingRegex.match(framePadding):
 		# if no number exists after $F then padding is None
-		if padding == 'F':
-			padding = None
+		padding = frameInfo['padding']
 
-	elif frameNumberReg.match(framePadding):
-		padding = len(framePadding)
+	elif _frameNumberRegex.match(framePadding):
 		# if total number of digits is less than 2 then assume padding is None
-		if padding <= 2:
-			padding = None
+		padding = frameInfo['padding']
 
 	else:
 		return filepath
@@ -486,41 +1026,34 @@ def normalizeFramePadding(filepath):
 	if not padding:
 		newPadding = '%d'
 
-	return filepath.replace(framePadding, newPadding)
+	# only swap the token itself, not matching text in the dirname
+	start = len(frameInfo['dirname']) + len(frameInfo['base']) + 1
+	return filepath[:start] + newPadding + filepath[start + len(framePadding):]
 
 def isValidSequence(filepath):
-	pathInfo = getPathInfo(filepath)
-	fName = pathInfo['name']
-
-	# if the name is only numbers or only frame padding
-	nameParts = fName.split('.')
-	if len(nameParts) < 2:
-		return False
+	return parseFramePath(filepath)['isSequence']
 
-	# gets position of frame padding
-	framePadding = fName.split('.')[-1]
-
-	hashReg = re.compile('##+')
-	dollarReg = re.compile('\$F[1-9]?')
-	frameReg = re.compile('%[0-9]{0,2}d')
-	frameNumberReg = re.compile('[0-9]+')
-
-	# if padding text match with any padding regex
-	if not hashReg.match(framePadding) and not \
-		dollarReg.match(framePadding) and not \
-		frameReg.match(framePadding) and not \
-		frameNumberReg.match(framePadding):
-		return False
+def getSequenceBaseName(filename, matchNumbersOnly=True):
+	'''
+	Returns everything before the frame number, ex:
+	dir/frame.1001.exr -> dir/frame
 
-	return True
+	Dotted names go through parseFramePath, name_1001.ext
+	style names fall back to a regex.  With matchNumbersOnly
+	False padding like %04d, #### or $F4 counts as the frame.
+	'''
+	if not matchNumbersOnly:
+		filename = normalizeFramePadding(filename)
+	frameInfo = parseFramePath(filename)
+	if frameInfo['isSequence'] and (frameInfo['frame'] is not None or
+		(not matchNumbersOnly and frameInfo['frameText'].startswith('%'))):
+		return frameInfo['dirname'] + frameInfo['base']
 
-def getSequenceBaseName(filename, matchNumbersOnly=True):
 	if matchNumbersOnly:
-		regex_baseName = re.compile('(.+)[_\.][0-9]+\.[a-z0-9]+$')
+		regex_baseName = _sequenceBaseNameRegex
 	else:
-		# name.%04d.ext
-		regex_baseName = re.compile('(.+)[_\.]%[0-9]+d\.[a-z0-9]+$')
-		filename = normalizeFramePadding(filename)
+		# name_%04d.ext
+		regex_baseName = _sequencePaddedBaseNameRegex
 	try:
 		baseName = regex_baseName.search(filename).group(1)
 		return baseName
@@ -530,9 +1063,18 @@ def getSequenceBaseName(filename, matchNumbersOnly=True):
 			<name>.<frameNumber>.<extension>: %s' % filename)
 
 def getFrameNumber(filename):
-	regex_FrameNumber = re.compile('.+[_\.]([0-9]+)\.[a-z0-9]+$')
+	'''
+	Returns the frame number text of a filename, ex:
+	dir/frame.1001.exr -> '1001'
+
+	Dotted names go through parseFramePath, name_1001.ext
+	style names fall back to a regex.
+	'''
+	frameInfo = parseFramePath(filename)
+	if frameInfo['frame'] is not None:
+		return frameInfo['frameText']
 	try:
-		frame = regex_FrameNumber.search(filename).group(1)
+		frame = _sequenceFrameNumberRegex.search(filename).group(1)
 		return frame
 	except:
 		raise IndexError('The filename given does not have the \
@@ -540,8 +1082,7 @@ def getFrameNumber(filename):
 			<name>.<frameNumber>.<extension>: %s' % filename)
 
 def isFrameRangeText(filename):
-	regex = re.compile('^[a-zA-Z0-9._/:%]+ [0-9]+-[0-9]+$')
-	return regex.match(filename) is not None
+	return _frameRangeTextRegex.match(filename) is not None
 
 def getFrameRangeText(filename, frameRange=None):
 	if not frameRange:
@@ -563,21 +1104,21 @@ def getFirstFileFromFrameRangeText(fileText):
 	filepath = normalizePath(fileText)
 	filePieces = filepath.split(' ')
 	filePieces[0] = normalizeFramePadding(filePieces[0])
-	fileInfo = getPathInfo(filePieces[0])
-
-	paddingRegEx = re.compile('%[0-9]{0,2}d')
+	frameInfo = parseFramePath(filePieces[0])
+	# the frame token, or the whole name if there's no dot
+	padding = frameInfo['frameText']
+	if padding is None:
+		padding = frameInfo['base']
 
 	if len(filePieces) == 2 and \
-		paddingRegEx.search(filePieces[0]) and \
+		_printfPaddingRegex.search(filePieces[0]) and \
 		unicode(filePieces[1].split('-')[0]).isnumeric():
 
-		padding = fileInfo['name'].split('.')[-1]
 		frame = padding % int(filePieces[1].split('-')[0])
 		filepath = filePieces[0].replace(padding, frame)
 
 	elif len(filePieces) == 1 and \
-		paddingRegEx.search(filePieces[0]):
-		padding = fileInfo['name'].split('.')[-1]
+		_printfPaddingRegex.search(filePieces[0]):
 		frameRangeDict = getFrameRange(fileText)
 		if not frameRangeDict:
 			return False
@@ -586,9 +1127,8 @@ def getFirstFileFromFrameRangeText(fileText):
 		filepath = frameRangeDict['base'].replace(padding, frame) + '.' + frameRangeDict['extension']
 
 	elif len(filePieces) == 1:
-		pathInfo = getPathInfo(filePieces[0])
 		try:
-			if unicode(pathInfo['name'].split('.')[-1]).isnumeric():
+			if unicode(padding).isnumeric():
 				filepath = filePieces[0]
 			else:
 				return False
@@ -601,6 +1141,319 @@ def getFirstFileFromFrameRangeText(fileText):
 
 	return filepath
 
+def getFrameSpans(frames):
+	'''
+	Collapses sorted frame numbers into (first, last) spans
+	in a single pass, ex: [1, 2, 3, 5] -> [(1, 3), (5, 5)]
+	'''
+	spans = []
+	first = last = None
+	for frame in frames:
+		if last is not None and frame <= last + 1:
+			if frame > last:
+				last = frame
+			continue
+		if first is not None:
+			spans.append((first, last))
+		first = last = frame
+	if first is not None:
+		spans.append((first, last))
+	return spans
+
+def formatFrameSpans(spans):
+	'''
+	Formats spans as compact text, ex: [(1, 3), (5, 5)] -> '1-3,5'
+	'''
+	return ','.join([
+		str(first) if first == last else '%d-%d' % (first, last)
+		for first, last in spans])
+
+class FrameSequence(object):
+	'''
+	A single sequence found by SequenceIndex.  Frames are kept
+	sorted in a compact integer array so range queries are O(1)
+	and frame lookups are O(log n).
+
+	Each frame is kept once, duplicates holds {frame: [paths]}
+	for frames found more than once, ex: frame.1.exr and
+	frame.01.exr in an unpadded sequence.
+	'''
+	__slots__ = ('dirname', 'base', 'padding', 'extension', 'frames', 'duplicates')
+
+	def __init__(self, dirname, base, padding, extension, frames, duplicates=None):
+		self.dirname = dirname
+		self.base = base
+		self.padding = padding
+		self.extension = extension
+		self.frames = array.array('l', sorted(set(frames)))
+		self.duplicates = duplicates or {}
+
+	def __repr__(self):
+		return '<FrameSequence %s %d-%d>' % \
+			(self.paddedPath, self.min, self.max)
+
+	def __len__(self):
+		return len(self.frames)
+
+	def __contains__(self, frame):
+		return self.hasFrame(frame)
+
+	@property
+	def min(self):
+		return self.frames[0]
+
+	@property
+	def max(self):
+		return self.frames[-1]
+
+	@property
+	def count(self):
+		return len(self.frames)
+
+	@property
+	def duration(self):
+		return self.frames[-1] - self.frames[0] + 1
+
+	@property
+	def complete(self):
+		return self.duration == len(self.frames)
+
+	@property
+	def missingCount(self):
+		return max(0, self.duration - len(self.frames))
+
+	@property
+	def paddingString(self):
+		if self.padding == 0:
+			return '%d'
+		return '%0' + str(self.padding) + 'd'
+
+	@property
+	def paddedFilename(self):
+		return self.base + '.' + self.paddingString + '.' + self.extension
+
+	@property
+	def paddedPath(self):
+		return self.dirname + self.paddedFilename
+
+	def getMissingSpans(self):
+		'''
+		Returns (first, last) spans of the frames missing between
+		min and max, the gaps between getFrameSpans' spans.
+		'''
+		spans = getFrameSpans(self.frames)
+		return [(spans[i - 1][1] + 1, spans[i][0] - 1)
+			for i in xrange(1, len(spans))]
+
+	def getMissingFramesText(self):
+		'''
+		Returns the missing frames as text, ex: '1001-1010,1013'
+		'''
+		return formatFrameSpans(self.getMissingSpans())
+
+	def hasFrame(self, frame):
+		i = bisect.bisect_left(self.frames, frame)
+		return i < len(self.frames) and self.frames[i] == frame
+
+	def getFramePath(self, frame):
+		return self.paddedPath % frame
+
+	def getFrameRange(self, path=None):
+		'''
+		Returns the same dictionary getFrameRange does.
+		'''
+		paddingString = self.paddingString
+		return {
+				'min': self.min,
+				'max': self.max,
+				'duration': self.duration,
+				'base': self.dirname + self.base + '.' + paddingString % self.min,
+				'baseUnpadded': self.base,
+				'extension': self.extension,
+				'complete': self.complete,
+				'path': path or self.paddedPath,
+				'padding': self.padding,
+				'paddingString': paddingString,
+				'paddedFilename': self.paddedFilename,
+				'paddedPath': self.paddedPath,
+			}
+
+class SequenceIndex(object):
+	'''
+	Scans a directory once and groups every name.####.ext file
+	into FrameSequences by base name, padding and extension.
+
+	Parameters:
+		path - directory to scan
+		depth - same as getFiles, 0 for just path, -1 for the whole tree
+	'''
+	def __init__(self, path, depth=0):
+		self.path = path
+		self.depth = depth
+		self.sequences = {}
+		self._byName = {}
+		self.scan()
+
+	def __len__(self):
+		return len(self.sequences)
+
+	def __iter__(self):
+		return iter(self.sequences.values())
+
+	def _dirKey(self, dirname):
+		return ensureEndingSlash(os.path.abspath(dirname))
+
+	def scan(self):
+		'''
+		(Re)scans the directory, rebuilding every sequence.
+		'''
+		# (dirKey, base, extension) -> padding -> [dirname, frames, hasLeadingZeros, shortPadded]
+		found = {}
+		for entry in iterGetFiles(self.path,
+				depth=self.depth,
+				filesOnly=True,
+				entries=True):
+			match = _sequenceFileRegex.match(entry.name)
+			if not match:
+				continue
+			base, frameText, extension = match.groups()
+			dirname = entry.path[:-len(entry.name)]
+			# same rule as getPadding, 2 digits or less is unpadded
+			padding = len(frameText) if len(frameText) > 2 else 0
+			byPadding = found.setdefault(
+				(self._dirKey(dirname), base, extension.lower()), {})
+			if padding not in byPadding:
+				byPadding[padding] = [dirname, [], False, []]
+			group = byPadding[padding]
+			frame = int(frameText)
+			group[1].append(frame)
+			if frameText[0] == '0' and len(frameText) > 1:
+				group[2] = True
+				if not padding:
+					# frame.01.exr lands on the same frame as frame.1.exr
+					group[3].append((frame, entry.path))
+
+		self.sequences = {}
+		self._byName = {}
+		for (dirKey, base, extension), byPadding in found.items():
+			# frames without leading zeros are just wider numbers in
+			# the padding below them, ex: 10000 in a %04d sequence
+			merged = []
+			for padding in sorted(byPadding):
+				dirname, frames, hasLeadingZeros, shortPadded = byPadding[padding]
+				if merged and not hasLeadingZeros:
+					merged[-1][3].extend(frames)
+				else:
+					merged.append([dirname, padding, shortPadded, frames])
+
+			for dirname, padding, shortPadded, frames in merged:
+				sequence = FrameSequence(dirname, base, padding, extension.lower(), frames)
+				if shortPadded and len(sequence.frames) < len(frames):
+					counts = collections.Counter(frames)
+					for frame, path in shortPadded:
+						if counts[frame] > 1:
+							sequence.duplicates.setdefault(frame,
+								[sequence.getFramePath(frame)]).append(path)
+				self.sequences[(dirKey, base, padding, sequence.extension)] = sequence
+				self._byName.setdefault((dirKey, base, sequence.extension), []).append(sequence)
+
+	def get(self, path):
+		'''
+		Returns the FrameSequence for a path like dir/frame.%04d.exr,
+		dir/frame.####.exr or dir/frame.1001.exr, or None.
+		'''
+		frameInfo = parseFramePath(path)
+		if not frameInfo['isSequence']:
+			return None
+		padding = frameInfo['padding']
+		dirKey = self._dirKey(frameInfo['dirname'] or '.')
+		base = frameInfo['base']
+		extension = frameInfo['extension']
+
+		sequence = self.sequences.get((dirKey, base, padding, extension))
+		if sequence:
+			return sequence
+		# %d matches any padding when there's only one to pick from
+		candidates = self._byName.get((dirKey, base, extension), [])
+		if padding == 0 and len(candidates) == 1:
+			return candidates[0]
+		return None
+
+	def getDuplicateFrames(self, path):
+		'''
+		Returns {frame: [paths]} for frames of path's sequence that
+		exist more than once with different padding,
+		ex: frame.1.exr and frame.0001.exr
+		'''
+		sequence = self.get(path)
+		if not sequence:
+			return {}
+		duplicates = dict((frame, list(paths))
+			for frame, paths in sequence.duplicates.items())
+		dirKey = self._dirKey(sequence.dirname)
+		candidates = self._byName.get((dirKey, sequence.base, sequence.extension), [])
+		if len(candidates) < 2:
+			return duplicates
+
+		def tagFrames(frames, i):
+			for frame in frames:
+				yield frame, i
+
+		# each sequence's frames are sorted so
+		# duplicates end up side by side
+		tagged = [tagFrames(candidate.frames, i)
+			for i, candidate in enumerate(candidates)]
+		previous = None
+		for frame, i in heapq.merge(*tagged):
+			if previous and previous[0] == frame:
+				paths = duplicates.setdefault(frame, [])
+				for duplicate in (candidates[previous[1]].getFramePath(frame),
+						candidates[i].getFramePath(frame)):
+					if duplicate not in paths:
+						paths.append(duplicate)
+			previous = (frame, i)
+		return duplicates
+
+	def getFrameRange(self, path):
+		'''
+		Same as cOS.getFrameRange but answered from the index.
+		'''
+		sequence = self.get(path)
+		if not sequence:
+			return None
+		return sequence.getFrameRange(normalizeFramePadding(path))
+
+def getMissingFrames(path, index=None):
+	'''
+	Reports the gaps in a sequence without a stat per frame.
+
+	Returns a dictionary with missing (list of (first, last) spans),
+	missingText (ex: '1001-1010,1013'), missingCount, and duplicates,
+	{frame: [paths]} for frames that exist with different padding.
+	Returns None if the sequence isn't found.
+
+	Parameters:
+		path - Generic file in sequence. Ex. text/frame.%04d.exr
+		index - optional SequenceIndex, otherwise path's
+			directory is scanned once
+	'''
+	if not isValidSequence(path):
+		return None
+	if index is None:
+		index = SequenceIndex(getPathInfo(path)['dirname'])
+
+	sequence = index.get(path)
+	if not sequence:
+		return None
+
+	missing = sequence.getMissingSpans()
+	return {
+			'missing': missing,
+			'missingText': formatFrameSpans(missing),
+			'missingCount': sequence.missingCount,
+			'duplicates': index.getDuplicateFrames(path),
+		}
+
 def openFileBrowser(path):
 	if os.path.isfile(path):
 		path = path.rpartition('/')[0]
@@ -614,34 +1467,345 @@ def openFileBrowser(path):
 	if isMac():
 		subprocess.check_call(['open', '--', path])
 
-def isValidEXR(filename, silent=False):
+# EXR file layout constants, from the OpenEXR file layout docs
+_exrMagic = 20000630
+_exrTiledFlag = 0x200
+_exrMultipartFlag = 0x1000
+# scanlines per chunk by compression type:
+# none, rle, zips, zip, piz, pxr24, b44, b44a, dwaa, dwab
+_exrLinesPerChunk = [1, 1, 1, 16, 32, 16, 32, 32, 32, 256]
+
+def _exrLevelCount(size, roundUp):
+	levels = 1
+	while size > 1:
+		size = (size + 1) // 2 if roundUp else size // 2
+		levels += 1
+	return levels
+
+def _exrLevelSize(size, level, roundUp):
+	if roundUp:
+		return max((size + (1 << level) - 1) >> level, 1)
+	return max(size >> level, 1)
+
+def _exrTileCount(width, height, tileWidth, tileHeight, mode):
+	levelMode = mode & 0xf
+	roundUp = (mode >> 4) == 1
+
+	def tiles(w, h):
+		return ((w + tileWidth - 1) // tileWidth) * \
+			((h + tileHeight - 1) // tileHeight)
+
+	# one level
+	if levelMode == 0:
+		return tiles(width, height)
+	# mipmap
+	if levelMode == 1:
+		levels = _exrLevelCount(max(width, height), roundUp)
+		return sum([tiles(
+			_exrLevelSize(width, l, roundUp),
+			_exrLevelSize(height, l, roundUp))
+			for l in range(levels)])
+	# ripmap
+	return sum([tiles(
+		_exrLevelSize(width, lx, roundUp),
+		_exrLevelSize(height, ly, roundUp))
+		for lx in range(_exrLevelCount(width, roundUp))
+		for ly in range(_exrLevelCount(height, roundUp))])
+
+def checkEXRQuick(filename):
+	'''
+	Structural check of an EXR that doesn't decode any pixels.
+	Parses the headers and chunk offset table with plain reads and
+	makes sure every chunk starts inside the file and the last
+	chunk of each part ends inside it.  Catches truncated and
+	unfinished renders for a few KB of reads, no OpenImageIO needed.
+
+	Returns the same dictionary as checkEXR.
+	'''
+	result = {
+		'path': filename,
+		'valid': False,
+		'error': None,
+		'scanline': None,
+	}
+	try:
+		exrFile = open(filename, 'rb')
+	except (IOError, OSError):
+		result['error'] = 'not found'
+		return result
+
+	with exrFile:
+		exrFile.seek(0, 2)
+		fileSize = exrFile.tell()
+		exrFile.seek(0)
+		buf = [exrFile.read(65536)]
+
+		def need(end):
+			# grow the buffer to at least end bytes
+			while len(buf[0]) < end:
+				more = exrFile.read(max(65536, end - len(buf[0])))
+				if not more:
+					raise EOFError('truncated header')
+				buf[0] += more
+			return buf[0]
+
+		def readString(pos):
+			while True:
+				end = buf[0].find(b'\0', pos)
+				if end != -1:
+					return buf[0][pos:end], end + 1
+				need(len(buf[0]) + 1)
+
+		try:
+			magic, version = struct.unpack_from('<ii', need(8), 0)
+			if magic != _exrMagic:
+				result['error'] = 'not an EXR'
+				return result
+
+			multipart = version & _exrMultipartFlag
+			pos = 8
+			headers = []
+			while True:
+				header = {}
+				while True:
+					name, pos = readString(pos)
+					if not name:
+						break
+					attrType, pos = readString(pos)
+					size = struct.unpack_from('<i', need(pos + 4), pos)[0]
+					pos += 4
+					header[name] = need(pos + size)[pos:pos + size]
+					pos += size
+				headers.append(header)
+				# multipart headers end with an empty header
+				if not multipart or need(pos + 1)[pos:pos + 1] == b'\0':
+					if multipart:
+						pos += 1
+					break
+
+			parts = []
+			for header in headers:
+				partType = header.get('type', b'').rstrip(b'\0')
+				if not partType:
+					partType = b'tiledimage' if version & _exrTiledFlag else b'scanlineimage'
+				xMin, yMin, xMax, yMax = struct.unpack('<iiii', header['dataWindow'])
+				width = xMax - xMin + 1
+				height = yMax - yMin + 1
+				linesPerChunk = None
+				tilesX = tileHeight = None
+				if 'tiles' in header:
+					tileWidth, tileHeight, mode = struct.unpack('<IIB', header['tiles'])
+					if mode & 0xf == 0:
+						tilesX = (width + tileWidth - 1) // tileWidth
+					chunkCount = _exrTileCount(width, height, tileWidth, tileHeight, mode)
+				else:
+					compression = ord(header['compression'][:1])
+					linesPerChunk = _exrLinesPerChunk[compression]
+					chunkCount = (height + linesPerChunk - 1) // linesPerChunk
+				if 'chunkCount' in header:
+					chunkCount = struct.unpack('<i', header['chunkCount'])[0]
+				parts.append((partType, yMin, linesPerChunk, tilesX, tileHeight, chunkCount))
+
+			tablesEnd = pos + 8 * sum([part[-1] for part in parts])
+			need(tablesEnd)
+
+			for partType, yMin, linesPerChunk, tilesX, tileHeight, chunkCount in parts:
+				offsets = struct.unpack_from('<%dQ' % chunkCount, buf[0], pos)
+				pos += 8 * chunkCount
+
+				for i, offset in enumerate(offsets):
+					if offset < tablesEnd or offset >= fileSize:
+						result['error'] = 'chunk %d outside the file' % i
+						if linesPerChunk:
+							result['scanline'] = yMin + i * linesPerChunk
+						elif tilesX:
+							result['scanline'] = yMin + (i // tilesX) * tileHeight
+						return result
+
+				# every chunk starts inside the file, make sure
+				# the last one in the file also ends inside it
+				lastOffset = max(offsets) if offsets else 0
+				if not lastOffset:
+					continue
+				exrFile.seek(lastOffset)
+				chunkHeader = exrFile.read(44)
+				if multipart:
+					chunkHeader = chunkHeader[4:]
+					lastOffset += 4
+				try:
+					if partType == b'scanlineimage':
+						y, size = struct.unpack_from('<ii', chunkHeader)
+						chunkEnd = lastOffset + 8 + size
+					elif partType == b'tiledimage':
+						size = struct.unpack_from('<i', chunkHeader, 16)[0]
+						chunkEnd = lastOffset + 20 + size
+					elif partType == b'deepscanline':
+						tableSize, sampleSize = struct.unpack_from('<QQ', chunkHeader, 4)
+						chunkEnd = lastOffset + 28 + tableSize + sampleSize
+					else:
+						tableSize, sampleSize = struct.unpack_from('<QQ', chunkHeader, 16)
+						chunkEnd = lastOffset + 40 + tableSize + sampleSize
+				except struct.error:
+					chunkEnd = fileSize + 1
+				if chunkEnd > fileSize:
+					result['error'] = 'last chunk runs past the end of the file'
+					if partType == b'scanlineimage' and len(chunkHeader) >= 4:
+						result['scanline'] = struct.unpack_from('<i', chunkHeader)[0]
+					return result
+
+		except (EOFError, KeyError, IndexError, TypeError, struct.error) as err:
+			result['error'] = 'bad header: %s' % err
+			return result
+
+	result['valid'] = True
+	return result
+
+def checkEXR(filename, quick=False):
+	'''
+	Reads every scanline, or every tile for tiled files, of an EXR.
+	With quick=True only checks the file structure, see checkEXRQuick.
+
+	Returns a dictionary with path, valid, error, and scanline,
+	the first scanline that failed to read or None.
+	'''
+	if quick:
+		return checkEXRQuick(filename)
+
 	import OpenImageIO
+	result = {
+		'path': filename,
+		'valid': False,
+		'error': None,
+		'scanline': None,
+	}
 	image = OpenImageIO.ImageInput.open(filename)
 	if not image:
-		if not silent:
-			print 'Invalid EXR, not found:', filename
-		return False
+		result['error'] = 'not found'
+		return result
 	try:
 		spec = image.spec()
 		if spec.tile_width == 0:
 			for y in range(spec.y, spec.y + spec.height):
-				pixels = image.read_scanline (y, spec.z, OpenImageIO.UNKNOWN)
-				if pixels == None:
-					if not silent:
-						print 'ERROR: EXR broken at scanline', y
-					return False
-		return True
+				pixels = image.read_scanline(y, spec.z, OpenImageIO.UNKNOWN)
+				if pixels is None:
+					result['error'] = 'broken at scanline %d' % y
+					result['scanline'] = y
+					return result
+		else:
+			for y in range(spec.y, spec.y + spec.height, spec.tile_height):
+				for x in range(spec.x, spec.x + spec.width, spec.tile_width):
+					pixels = image.read_tile(x, y, spec.z, OpenImageIO.UNKNOWN)
+					if pixels is None:
+						result['error'] = 'broken at tile %d, %d' % (x, y)
+						result['scanline'] = y
+						return result
+		result['valid'] = True
 	except Exception as err:
-		if not silent:
-			print err
-		return False
+		result['error'] = str(err)
+	finally:
+		image.close()
+	return result
+
+def isValidEXR(filename, silent=False, quick=False):
+	result = checkEXR(filename, quick)
+	if not result['valid'] and not silent:
+		if result['error'] == 'not found':
+			print 'Invalid EXR, not found:', filename
+		elif result['scanline'] is not None:
+			print 'ERROR: EXR broken at scanline', result['scanline']
+		else:
+			print result['error']
+	return result['valid']
+
+def _checkEXRFrame(args):
+	# module level so multiprocessing can pickle it
+	frame, filename, quick = args
+	result = checkEXR(filename, quick)
+	result['frame'] = frame
+	return result
+
+def validateEXRSequence(paddedFilename, workers=None, failFast=False, frameRange=None, quick=False):
+	'''
+	Checks every frame of an EXR sequence on a process pool.
+
+	Returns a dictionary with valid, complete, frames, the
+	checkEXR result for each frame checked keyed by frame number,
+	firstBad, the result for the lowest broken frame or None, and
+	ok, bad and missing, sorted lists of the frames checked.
+
+	Parameters:
+		paddedFilename - Ex. render/frame.%04d.exr
+		workers - number of processes, defaults to numberOfProcesses(),
+			1 checks frames in this process
+		failFast - stop at the first broken frame
+		frameRange - getFrameRange result if it's already known
+		quick - only check file structure, see checkEXRQuick
+	'''
+	report = {
+		'valid': False,
+		'complete': False,
+		'frames': {},
+		'firstBad': None,
+		'ok': [],
+		'bad': [],
+		'missing': [],
+	}
+	if not frameRange:
+		frameRange = getFrameRange(paddedFilename)
+	if not frameRange:
+		return report
+	report['complete'] = frameRange['complete']
+
+	frames = [(f, frameRange['path'] % f, quick)
+		for f in range(frameRange['min'], frameRange['max'] + 1)]
+
+	if not workers:
+		workers = numberOfProcesses()
+	pool = None
+	if workers > 1:
+		pool = multiprocessing.Pool(workers)
+		# imap keeps frame order, so the first failure
+		# seen is the lowest broken frame
+		results = pool.imap(_checkEXRFrame, frames, chunksize=1)
+	else:
+		results = (_checkEXRFrame(f) for f in frames)
+
+	try:
+		for result in results:
+			report['frames'][result['frame']] = result
+			if result['valid']:
+				report['ok'].append(result['frame'])
+			elif result['error'] == 'not found':
+				report['missing'].append(result['frame'])
+			else:
+				report['bad'].append(result['frame'])
+			if not result['valid'] and not report['firstBad']:
+				report['firstBad'] = result
+				if failFast:
+					break
+	finally:
+		if pool:
+			pool.terminate()
+			pool.join()
+
+	report['valid'] = report['complete'] and not report['firstBad']
+	return report
 
-def isValidEXRSequence(paddedFilename, silent=False):
+def isValidEXRSequence(paddedFilename, silent=False, parallel=False, workers=None, quick=False):
 	frameRange = getFrameRange(paddedFilename)
 	if not frameRange or not frameRange['complete']:
 		return False
+	if parallel:
+		report = validateEXRSequence(paddedFilename,
+			workers=workers,
+			failFast=True,
+			frameRange=frameRange,
+			quick=quick)
+		if report['firstBad'] and not silent:
+			print 'Invalid EXR:', report['firstBad']['path'], report['firstBad']['error']
+		return report['valid']
 	for f in range(frameRange['min'], frameRange['max'] + 1):
-		if not isValidEXR(frameRange['path'] % f):
+		if not isValidEXR(frameRange['path'] % f, silent, quick):
 			return False
 	return True
 
@@ -852,90 +2016,481 @@ def removeFile(path):
 		else:
 			raise err
 
-def removeDir(path):
+def removeDir(path, workers=None, waitTime=None, background=False):
 	'''
 	Removes a directory.  Returns the error instead of
-	throwing it
+	throwing it if path doesn't exist, otherwise raises the
+	OSError that stopped the delete
+
+	Parameters:
+		path - directory to remove
+		workers - number of threads, see removeTree
+		waitTime - seconds to give up after, None to never give up
+		background - rename path out of the way and return right
+			away, the TrashReaper deletes it later
 	'''
 	if os.path.isfile(path):
 		return Exception('Path is a file, not a directory')
+	# If error is "not exists", don't raise, just return
 	try:
-		shutil.rmtree(path)
+		os.lstat(path)
+	except OSError as err:
+		return err
+
+	if background and not os.path.islink(path):
+		try:
+			getTrashReaper().trash(path)
+			return True
+		except OSError:
+			# couldn't rename, ex: files open on windows,
+			# so delete it here instead
+			pass
+
+	summary = removeTree(path, workers=workers, waitTime=waitTime)
+	if summary['success']:
 		return True
-	except Exception as err:
-		# If error is "not exists", don't raise, just return
-		if not os.path.exists(path):
-			return err
-		else:
-			raise err
+	if summary['error']:
+		raise OSError(errno.ENOTDIR, summary['error'], path)
+	if summary['failed']:
+		# a folder that isn't empty is just fallout
+		# from whatever inside it failed to delete
+		errors = sorted(summary['failed'].items(),
+			key=lambda item: (item[1].errno == errno.ENOTEMPTY, item[0]))
+		raise errors[0][1]
+	raise OSError(errno.ETIMEDOUT, 'Timed out removing', path)
+
+def _removeFile(path):
+	try:
+		os.unlink(path)
+	except OSError as err:
+		# read only files on windows need to be made writable first
+		if err.errno not in (errno.EACCES, errno.EPERM) or \
+			not os.path.isfile(path):
+			raise
+		os.chmod(path, stat.S_IWRITE)
+		os.unlink(path)
 
-def emptyDir(folder,onlyFiles=False, waitTime=5):
+def _removePaths(paths, remove, deadline):
+	'''
+	Removes a batch of paths, returns (removed, failed, timedOut)
 	'''
-	Removes all files and folders from a directory.
+	removed = 0
+	failed = {}
+	for path in paths:
+		if deadline and time.time() > deadline:
+			return removed, failed, True
+		try:
+			remove(path)
+			removed += 1
+		except OSError as err:
+			# already gone is fine
+			if err.errno != errno.ENOENT:
+				failed[path] = err
+	return removed, failed, False
+
+# trees with more files than this are deleted on a thread
+# pool when removeTree isn't told how many workers to use
+_removeTreeParallelFiles = 1024
+
+def removeTree(path, keepRoot=False, onlyFiles=False, workers=None, waitTime=None, batchSize=64,
+		progress=None):
+	'''
+	Deletes everything under path.  Files are unlinked in batches
+	while the tree is still being listed, then folders are removed
+	deepest first, a level at a time.  Symlinks are removed, never
+	followed.
+
+	With workers the tree is listed and deleted on one thread pool
+	of that size.  Without, small trees are deleted in this thread
+	and a pool of numberOfProcesses() threads only starts once more
+	than _removeTreeParallelFiles files have been found.
+
+	Returns a dictionary with success, error, files and dirs
+	removed, failed, {path: OSError}, timedOut, True if it stopped
+	because waitTime ran out, and seconds.
 
 	Parameters:
-		folder - directory from which to delete
-		onlyFiles - False by default, if only files should be deleted
-		waitTime - 5 by default, how many seconds to wait.
+		path - directory to delete
+		keepRoot - leave path itself in place, just empty it
+		onlyFiles - only remove files, leaving every folder
+		workers - number of threads, 1 deletes in this thread,
+			None picks based on the size of the tree
+		waitTime - seconds to give up after, None to never give up
+		batchSize - files handed to a thread at a time
+		progress - called as progress(path, size, removed) for each
+			file, with removed False when it's listed and True once
+			it's deleted.  File sizes are only read when it's given.
 	'''
-	# if onlyFiles:
-	# 	print 'Deleting all files in: %s' % folder
-	# else:
-	# 	print 'Deleting all files and folders in: %s' % folder
+	from multiprocessing.pool import ThreadPool
 
 	startTime = time.time()
-	for root, dirs, files in os.walk(folder):
-		if (time.time() > startTime + waitTime):
-			break
-		for f in files:
-			if (time.time() > startTime + waitTime):
+	deadline = startTime + waitTime if waitTime else None
+	summary = {
+		'success': False,
+		'error': None,
+		'files': 0,
+		'dirs': 0,
+		'failed': {},
+		'timedOut': False,
+		'seconds': 0,
+	}
+	if not os.path.isdir(path) or os.path.islink(path):
+		summary['error'] = 'Not a directory: ' + path
+		return summary
+
+	# (key, paths, AsyncResult) for batches running on the pool
+	pending = []
+	# {path: size} of listed files, only with progress
+	sizes = {}
+
+	def record(key, paths, result):
+		removed, failed, timedOut = result
+		summary[key] += removed
+		summary['failed'].update(failed)
+		summary['timedOut'] = summary['timedOut'] or timedOut
+		if progress and key == 'files':
+			# _removePaths goes in order, so these were all tried
+			for removedPath in paths[:removed + len(failed)]:
+				if removedPath not in failed:
+					progress(removedPath, sizes.pop(removedPath, 0), True)
+
+	def removeBatch(pool, key, paths, remove):
+		if pool:
+			pending.append((key, paths, pool.apply_async(_removePaths,
+				(paths, remove, deadline))))
+		else:
+			record(key, paths, _removePaths(paths, remove, deadline))
+
+	def wait():
+		while pending:
+			key, paths, asyncResult = pending.pop(0)
+			record(key, paths, asyncResult.get())
+
+	pool = None
+	if workers and workers > 1:
+		pool = ThreadPool(workers)
+	# without workers, only big trees get a pool
+	autoWorkers = 0 if workers else numberOfProcesses()
+	try:
+		batch = []
+		filesFound = 0
+		# depth -> [dir]
+		dirsByDepth = {}
+		# the walk shares the pool so listing and
+		# deleting never start two sets of threads
+		for entry in iterGetFiles(path,
+				entries=True,
+				parallel=pool is not None,
+				pool=pool):
+			if deadline and time.time() > deadline:
+				summary['timedOut'] = True
 				break
-			try:
-				os.unlink(os.path.join(root, f))
-			except:
-				pass
-		if not onlyFiles:
-			for d in dirs:
-				if (time.time() > startTime + waitTime):
-					break
+			if entry.is_dir() and not entry.is_symlink():
+				dirsByDepth.setdefault(entry.path.count('/'), []).append(entry.path)
+				continue
+			batch.append(entry.path)
+			filesFound += 1
+			if progress:
 				try:
-					shutil.rmtree(os.path.join(root, d))
-				except:
-					pass
+					size = 0 if entry.is_symlink() else entry.size
+				except OSError:
+					size = 0
+				sizes[entry.path] = size
+				progress(entry.path, size, False)
+			if autoWorkers > 1 and not pool and filesFound > _removeTreeParallelFiles:
+				pool = ThreadPool(autoWorkers)
+			if len(batch) >= batchSize:
+				removeBatch(pool, 'files', batch, _removeFile)
+				batch = []
+		if batch:
+			removeBatch(pool, 'files', batch, _removeFile)
+		wait()
+
+		if not onlyFiles and not summary['timedOut']:
+			for depth in sorted(dirsByDepth, reverse=True):
+				dirs = dirsByDepth[depth]
+				for i in range(0, len(dirs), batchSize):
+					removeBatch(pool, 'dirs', dirs[i:i + batchSize], os.rmdir)
+				wait()
+				if summary['timedOut']:
+					break
+
+			if not keepRoot and not summary['timedOut']:
+				record('dirs', [path], _removePaths([path], os.rmdir, None))
+	finally:
+		if pool:
+			pool.terminate()
+			pool.join()
+
+	summary['seconds'] = time.time() - startTime
+	summary['success'] = not summary['failed'] and not summary['timedOut']
+	return summary
+
+def emptyDir(folder, onlyFiles=False, waitTime=5, workers=None, background=False):
+	'''
+	Removes all files and folders from a directory,
+	returns the removeTree summary.
+
+	Parameters:
+		folder - directory from which to delete
+		onlyFiles - False by default, if only files should be deleted
+		waitTime - 5 by default, how many seconds to wait.
+		workers - number of threads, see removeTree
+		background - move the contents out of the way and return
+			right away, the TrashReaper deletes them later.
+			Anything that can't be moved is deleted here.  With
+			onlyFiles just the files directly in folder are moved,
+			files in subfolders are still deleted here.
+	'''
+	if background:
+		try:
+			getTrashReaper().trashContents(folder, onlyFiles=onlyFiles)
+		except OSError:
+			pass
+	return removeTree(folder,
+		keepRoot=True,
+		onlyFiles=onlyFiles,
+		workers=workers,
+		waitTime=waitTime)
 
 def copy(src, dst):
 	return shutil.copy2(src, dst)
 
-def copyTree(src, dst, symlinks=False, ignore=None):
-	'''
-	Copies the src directory tree to the destination.
+def copyTree(src, dst, symlinks=False, ignore=None, workers=None, progress=None):
 	'''
-	dir_util.copy_tree(src, dst)
+	Copies the src directory tree to the destination,
+	see syncDir.  Only changed files are copied.
 
-def copyFileSequence(src, dst, rangeInfo=False, echo=False):
-	if '%' not in src:
-		print 'No frame padding in:', src
-		return False
-	if '%' not in dst:
-		print 'No frame padding in:', dst
-		return False
+	Symlinked folders are copied as real folders with their
+	contents unless symlinks, then links are recreated as links.
+	ignore works like shutil.copytree's, ex: shutil.ignore_patterns
 
-	if not rangeInfo:
-		rangeInfo = getFrameRange(src)
-	result = True
-	for i in range(rangeInfo['min'], rangeInfo['max'] + 1):
-		sourcePath = src % i
-		destPath = dst % i
-		if echo:
-			print sourcePath, '  >  ', destPath
+	Raises if anything couldn't be copied, ex: a dangling symlink,
+	after copying everything else.
+	'''
+	report = syncDir(src, dst,
+		workers=workers,
+		progress=progress,
+		symlinks=symlinks,
+		ignore=ignore)
+	if report['error']:
+		raise Exception(report['error'])
+	if report['failed']:
+		raise Exception('Could not copy from %s:\n%s' % (src,
+			'\n'.join('%s: %s' % failed for failed in sorted(report['failed'].items()))))
+	return report
+
+# copy_file_range and sendfile copy in the kernel without
+# passing the data through python, only on newer pythons
+_osCopyFileRange = getattr(os, 'copy_file_range', None)
+_osSendfile = getattr(os, 'sendfile', None)
+# errors that mean the kernel copy doesn't work
+# for these files, ex: across devices
+_kernelCopyErrors = set(getattr(errno, name) for name in
+	('EXDEV', 'EINVAL', 'ENOSYS', 'ENOTSUP', 'EOPNOTSUPP', 'ENOTSOCK', 'EBADF')
+	if hasattr(errno, name))
+_copyBufferSize = 8 * 1024 * 1024
+
+def _copyFileKernel(srcFd, dstFd, size):
+	offset = 0
+	while offset < size:
+		if _osCopyFileRange:
+			sent = _osCopyFileRange(srcFd, dstFd, size - offset)
+		else:
+			sent = _osSendfile(dstFd, srcFd, offset, size - offset)
+		if not sent:
+			break
+		offset += sent
+
+def _copyFileData(src, dst):
+	'''
+	Copies src's data to dst, in the kernel when it's supported,
+	otherwise with large buffered reads.  Returns bytes copied.
+	'''
+	with open(src, 'rb') as srcFile:
+		with open(dst, 'wb') as dstFile:
+			size = os.fstat(srcFile.fileno()).st_size
+			if _osCopyFileRange or _osSendfile:
+				try:
+					_copyFileKernel(srcFile.fileno(), dstFile.fileno(), size)
+					return size
+				except OSError as err:
+					if err.errno not in _kernelCopyErrors:
+						raise
+					srcFile.seek(0)
+					dstFile.seek(0)
+					dstFile.truncate()
+			shutil.copyfileobj(srcFile, dstFile, _copyBufferSize)
+			return size
+
+def _hashFile(path):
+	fileHash = hashlib.md5()
+	with open(path, 'rb') as f:
+		for chunk in iter(lambda: f.read(_copyBufferSize), b''):
+			fileHash.update(chunk)
+	return fileHash.digest()
+
+def _isSameFile(src, dst, srcStat, dstStat, checkHash=False):
+	if srcStat.st_size != dstStat.st_size:
+		return False
+	if not checkHash:
+		# same size and mtime to the second, like rsync
+		return int(srcStat.st_mtime) == int(dstStat.st_mtime)
+	try:
+		return _hashFile(src) == _hashFile(dst)
+	except (IOError, OSError):
+		return False
+
+def _syncFile(src, dst, skipExisting=True, dryRun=False, checkHash=False, copyMode=False):
+	'''
+	Copies src to dst unless dst already matches its size and mtime,
+	or size and content with checkHash.  dst gets src's mtime only
+	once the copy finishes, so a partial copy never looks up to date.
+
+	Returns a dictionary with source, destination, status
+	(copied, skipped, toCopy or failed), bytes and error.
+	'''
+	result = {
+		'source': src,
+		'destination': dst,
+		'status': 'failed',
+		'bytes': 0,
+		'error': None,
+	}
+	try:
+		srcStat = os.stat(src)
+	except OSError as err:
+		result['error'] = 'Missing source: ' + str(err)
+		return result
+
+	if skipExisting:
 		try:
-			shutil.copyfile(sourcePath, destPath)
-		except:
-			print 'Could not copy:', sourcePath, destPath
-			result = False
+			dstStat = os.stat(dst)
+		except OSError:
+			dstStat = None
+		if dstStat and _isSameFile(src, dst, srcStat, dstStat, checkHash):
+			result['status'] = 'skipped'
+			return result
+
+	if dryRun:
+		result['status'] = 'toCopy'
+		result['bytes'] = srcStat.st_size
+		return result
 
+	try:
+		result['bytes'] = _copyFileData(src, dst)
+		if copyMode:
+			os.chmod(dst, stat.S_IMODE(srcStat.st_mode))
+		os.utime(dst, (srcStat.st_atime, srcStat.st_mtime))
+		result['status'] = 'copied'
+	except (IOError, OSError) as err:
+		result['error'] = str(err)
 	return result
 
+def _syncFileArgs(args):
+	return args[0], _syncFile(*args[1:])
+
+def syncFileSequence(src, dst, rangeInfo=None, workers=None, skipExisting=True, dryRun=False, echo=False):
+	'''
+	Copies every frame of a sequence on a thread pool, skipping
+	frames whose destination already has the same size and mtime,
+	so an interrupted copy picks up where it left off.
+
+	Returns a dictionary with success, error, dryRun, frames, the
+	_syncFile result for each frame keyed by frame number, copied,
+	skipped and failed frame lists, and bytes copied.  On a dry run
+	copied and bytes are what would have been copied.
+
+	Parameters:
+		src - Ex. plates/frame.%04d.exr
+		dst - Ex. cache/frame.%04d.exr
+		rangeInfo - getFrameRange result if it's already known
+		workers - number of threads, defaults to numberOfProcesses(),
+			1 copies frames in this thread
+		skipExisting - skip frames that already match
+		dryRun - only report what would be copied
+		echo - print each frame as it's done
+	'''
+	report = {
+		'success': False,
+		'error': None,
+		'dryRun': dryRun,
+		'frames': {},
+		'copied': [],
+		'skipped': [],
+		'failed': [],
+		'bytes': 0,
+	}
+	if '%' not in src:
+		report['error'] = 'No frame padding in: ' + src
+		return report
+	if '%' not in dst:
+		report['error'] = 'No frame padding in: ' + dst
+		return report
+
+	if not rangeInfo:
+		rangeInfo = getFrameRange(src)
+	if not rangeInfo:
+		report['error'] = 'Invalid sequence: ' + src
+		return report
+
+	if not dryRun:
+		makeDirs(dst)
+
+	frames = [(f, src % f, dst % f, skipExisting, dryRun)
+		for f in range(rangeInfo['min'], rangeInfo['max'] + 1)]
+
+	if not workers:
+		workers = numberOfProcesses()
+	pool = None
+	if workers > 1 and len(frames) > 1:
+		from multiprocessing.pool import ThreadPool
+		pool = ThreadPool(min(workers, len(frames)))
+		results = pool.imap_unordered(_syncFileArgs, frames)
+	else:
+		results = (_syncFileArgs(f) for f in frames)
+
+	statusLists = {
+		'copied': report['copied'],
+		'toCopy': report['copied'],
+		'skipped': report['skipped'],
+		'failed': report['failed'],
+	}
+	try:
+		for frame, result in results:
+			report['frames'][frame] = result
+			statusLists[result['status']].append(frame)
+			report['bytes'] += result['bytes']
+			if echo:
+				print result['source'], '  >  ', result['destination'], result['status']
+	finally:
+		if pool:
+			pool.terminate()
+			pool.join()
+
+	for frameList in (report['copied'], report['skipped'], report['failed']):
+		frameList.sort()
+	report['success'] = not report['failed']
+	return report
+
+def copyFileSequence(src, dst, rangeInfo=False, echo=False, parallel=False, workers=None):
+	'''
+	Copies every frame of a sequence, returns True if they all
+	copied.  See syncFileSequence for skipping frames that are
+	already there and per frame results.
+	'''
+	report = syncFileSequence(src, dst,
+		rangeInfo=rangeInfo,
+		workers=workers if parallel else 1,
+		skipExisting=False,
+		echo=echo)
+	if report['error']:
+		print report['error']
+	for frame in report['failed']:
+		result = report['frames'][frame]
+		print 'Could not copy:', result['source'], result['destination']
+	return report['success']
+
 def rename(oldPath, newPath):
 	oldPath = normalizePath(oldPath)
 	newPath = normalizePath(newPath)
@@ -971,50 +2526,192 @@ def getUserHome():
 	userHome = os.environ.get('HOME') or os.environ.get('HOMEPATH') or os.environ.get('USERPROFILE')
 	return normalizeDir(userHome)
 
-def duplicateDir(src, dest):
+def syncDir(src, dst, workers=None, checkHash=False, dryRun=False, progress=None,
+		symlinks=False, ignore=None):
 	'''
-	Duplicates a directory, copying files that don't already exist.
+	Makes dst a copy of src, copying only files that are missing or
+	differ in size or mtime, or in content with checkHash.  The whole
+	tree is listed and every folder made before copying starts, then
+	files are copied on a thread pool.
+
+	Returns a dictionary with success, error, dryRun, dirs made,
+	copied and skipped files, failed, {file: error}, bytes copied and
+	seconds.  Paths are relative to src.  On a dry run dirs, copied
+	and bytes are what would have been made and copied.
+
+	Parameters:
+		src - directory to copy from
+		dst - directory to copy into
+		workers - number of threads, defaults to numberOfProcesses(),
+			1 copies files in this thread
+		checkHash - compare same sized files by content, not mtime
+		dryRun - only report what would be copied
+		progress - called after each file with a dictionary of files,
+			totalFiles, bytes, seconds, filesPerSecond and bytesPerSecond
+		symlinks - recreate symlinks as links rather than following
+			them and copying what they point to
+		ignore - called as ignore(directory, names) for each source
+			directory, returns the names not to copy
 	'''
-	src = ensureEndingSlash(src)
-	dest = ensureEndingSlash(dest)
+	startTime = time.time()
+	report = {
+		'success': False,
+		'error': None,
+		'dryRun': dryRun,
+		'dirs': [],
+		'copied': [],
+		'skipped': [],
+		'failed': {},
+		'bytes': 0,
+		'seconds': 0,
+	}
+	if not os.path.isdir(src):
+		report['error'] = 'Not a directory: ' + src
+		return report
+
+	srcPrefix = ensureEndingSlash(src)
+	dst = ensureEndingSlash(dst)
+	if not workers:
+		workers = numberOfProcesses()
+
+	dirs = []
+	files = []
+	links = []
+	entries = iterGetFiles(src,
+		entries=True,
+		parallel=workers > 1,
+		workers=workers,
+		followLinks=not symlinks)
+	if ignore:
+		entries = _ignoreEntries(entries, srcPrefix, ignore)
+	for entry in entries:
+		relativePath = entry.path[len(srcPrefix):]
+		if symlinks and entry.is_symlink():
+			links.append(relativePath)
+		elif entry.is_dir():
+			dirs.append(relativePath)
+		else:
+			files.append(relativePath)
 
-	for root, dirs, files in os.walk(src):
-		for n in dirs:
-			srcFolder = root + '/' + n
-			print 'dir:', srcFolder
-			destFolder = srcFolder.replace(src, dest)
-			if not os.path.isdir(destFolder):
-				try:
-					os.makedirs(destFolder)
-					print 'mkdir:', destFolder
-				except Exception as err:
-					print err
-					print 'Could not mkdir: ', destFolder
-
-		for n in files:
-			srcFilename = root + '/' + n
-			print 'file:', srcFilename
-			destFilename = srcFilename.replace(src, dest)
-			if not os.path.isfile(destFilename):
-				try:
-					print 'copy:', srcFilename
-					shutil.copy(srcFilename, destFilename)
-				except Exception as err:
-					print err
-					print 'Could not copy: ', srcFilename
-			else:
-				print 'exists:', srcFilename
+	# sorted so parents are made before their children
+	for relativePath in [''] + sorted(dirs):
+		if os.path.isdir(dst + relativePath):
+			continue
+		if relativePath:
+			report['dirs'].append(relativePath)
+		if dryRun:
+			continue
+		try:
+			os.makedirs(dst + relativePath)
+		except OSError as err:
+			if not os.path.isdir(dst + relativePath):
+				report['failed'][relativePath] = str(err)
+
+	for relativePath in sorted(links):
+		linkTo = os.readlink(srcPrefix + relativePath)
+		linkPath = dst + relativePath
+		if os.path.islink(linkPath) and os.readlink(linkPath) == linkTo:
+			report['skipped'].append(relativePath)
+			continue
+		report['copied'].append(relativePath)
+		if dryRun:
+			continue
+		try:
+			if os.path.lexists(linkPath):
+				os.remove(linkPath)
+			os.symlink(linkTo, linkPath)
+		except OSError as err:
+			report['copied'].remove(relativePath)
+			report['failed'][relativePath] = str(err)
+
+	args = [(f, srcPrefix + f, dst + f, True, dryRun, checkHash, True)
+		for f in sorted(files)]
+	pool = None
+	if workers > 1 and len(args) > 1:
+		from multiprocessing.pool import ThreadPool
+		pool = ThreadPool(min(workers, len(args)))
+		results = pool.imap_unordered(_syncFileArgs, args)
+	else:
+		results = (_syncFileArgs(a) for a in args)
 
+	filesDone = 0
+	try:
+		for relativePath, result in results:
+			filesDone += 1
+			if result['status'] == 'skipped':
+				report['skipped'].append(relativePath)
+			elif result['status'] == 'failed':
+				report['failed'][relativePath] = result['error']
+			else:
+				report['copied'].append(relativePath)
+				report['bytes'] += result['bytes']
+
+			if progress:
+				seconds = max(time.time() - startTime, 0.000001)
+				progress({
+					'files': filesDone,
+					'totalFiles': len(args),
+					'bytes': report['bytes'],
+					'seconds': seconds,
+					'filesPerSecond': filesDone / seconds,
+					'bytesPerSecond': report['bytes'] / seconds,
+				})
+	finally:
+		if pool:
+			pool.terminate()
+			pool.join()
+
+	report['copied'].sort()
+	report['skipped'].sort()
+	report['seconds'] = time.time() - startTime
+	report['success'] = not report['failed']
+	return report
+
+def _ignoreEntries(entries, srcPrefix, ignore):
+	'''
+	Drops the entries ignore(directory, names) returns for their
+	directory, and everything under an ignored directory.
+	'''
+	entries = list(entries)
+	namesByDir = {}
+	for entry in entries:
+		parent = entry.path[len(srcPrefix):-len(entry.name)]
+		namesByDir.setdefault(parent, []).append(entry.name)
+
+	ignored = set()
+	for parent, names in namesByDir.items():
+		directory = (srcPrefix + parent).rstrip('/') or '/'
+		for name in ignore(directory, names) or ():
+			ignored.add(parent + name)
+
+	kept = []
+	for entry in entries:
+		relativePath = entry.path[len(srcPrefix):]
+		parts = relativePath.split('/')
+		if not any('/'.join(parts[:i]) in ignored
+				for i in range(1, len(parts) + 1)):
+			kept.append(entry)
+	return kept
+
+def duplicateDir(src, dest, workers=None, progress=None):
+	'''
+	Duplicates a directory, copying files that are missing
+	or have changed, see syncDir.  Anything that can't be
+	copied is printed and left in the report's failed.
+	'''
+	report = syncDir(src, dest, workers=workers, progress=progress)
+	for path, error in sorted(report['failed'].items()):
+		print 'Could not copy:', path, error
+	return report
 
 def getFolderContents(filepath, includeFiles=True, includeFolders=True):
 	'''
 	Returns files and folders directly under the path.
 	'''
 	paths = []
-	files = os.listdir(filepath)
-	for f in files:
-		filename = os.path.join(filepath, f)
-		isDir = os.path.isdir(filename)
+	for entry in _scanDir(filepath):
+		filename = os.path.join(filepath, entry.name)
+		isDir = _isDirEntry(entry)
 		if includeFolders and isDir:
 			paths.append(normalizeDir(filename))
 		elif includeFiles and not isDir:
@@ -1022,7 +2719,7 @@ def getFolderContents(filepath, includeFiles=True, includeFolders=True):
 
 	return paths
 
-def collectFiles(searchPaths, extensions, exclusions):
+def collectFiles(searchPaths, extensions, exclusions, parallel=False, workers=None):
 	'''
 	Gets all files in the searchPaths with given extensions.
 
@@ -1031,98 +2728,456 @@ def collectFiles(searchPaths, extensions, exclusions):
 		searchPaths - list of paths to search
 		extensions - list of extensions for which to look
 		exclusions - files to exclude from final list
+		parallel - walk each search path with a thread pool
+		workers - size of that pool, defaults to numberOfProcesses()
 	'''
+	return list(iterCollectFiles(searchPaths,
+		extensions,
+		exclusions,
+		parallel=parallel,
+		workers=workers))
 
-	filesToReturn = []
-	searchPaths = ensureArray(searchPaths)
-	extensions = ensureArray(extensions)
-	exclusions = ensureArray(exclusions)
-
-	for path in searchPaths:
-		for root, dirs, files in os.walk(path):
-			for name in files:
-				name = join(normalizeDir(root), normalizePath(name))
-				if (getExtension(name) in extensions) and (name not in exclusions):
-					if name not in filesToReturn:
-						filesToReturn.append(getPathInfo(name))
-	return filesToReturn
+def iterCollectFiles(searchPaths, extensions, exclusions, parallel=False, workers=None):
+	'''
+	Generator version of collectFiles, yields each file's PathInfo
+	as it's found so large trees can feed later stages as they go.
+	'''
+	extensions = frozenset(ensureArray(extensions))
+	exclusions = frozenset(ensureArray(exclusions))
+	# overlapping search paths would otherwise
+	# return the same file twice
+	seen = set()
+
+	for path in ensureArray(searchPaths):
+		for name in iterGetFiles(path,
+				filesOnly=True,
+				parallel=parallel,
+				workers=workers):
+			if name in seen:
+				continue
+			if (getExtension(name) in extensions) and (name not in exclusions):
+				seen.add(name)
+				yield PathInfo(name)
 
-def collectAllFiles(searchDir):
+def collectAllFiles(searchDir, parallel=False, workers=None):
 	'''
 	Returns all files within a specified searchDir.
 	'''
+	return list(iterCollectAllFiles(searchDir,
+		parallel=parallel,
+		workers=workers))
 
+def iterCollectAllFiles(searchDir, parallel=False, workers=None):
+	'''
+	Generator version of collectAllFiles.
+	'''
 	searchDir = normalizeDir(searchDir)
 
-	filesToReturn = []
-	for root, dirs, files in os.walk(searchDir):
-		for name in files:
-				name = join(normalizeDir(root), normalizePath(name))
-				if name not in filesToReturn:
-					filesToReturn.append(getPathInfo(name))
-	return filesToReturn
+	for name in iterGetFiles(searchDir,
+			filesOnly=True,
+			parallel=parallel,
+			workers=workers):
+		yield PathInfo(name)
 
 def collapseFiles(fileList, imageSequencesOnly=False):
-	fileList.sort()
+	'''
+	Collapses image sequences to 'name.%04d.ext first-last',
+	other files are passed through unless imageSequencesOnly.
+
+	Files are grouped in one pass on (prefix, padding, suffix) so
+	any number of dots works, ex: name.v2.1001.exr or
+	name.1001.bgeo.sc.  A sequence with gaps gives one entry
+	per span.  fileList can be any iterable of paths or FileEntry's,
+	it's never copied or sorted.  Output is in sorted order.
+	'''
+	# paths, or sequence keys in place of their first file
+	entries = []
+	# (prefix, padding, suffix) -> [frame text]
+	sequences = {}
+
+	# the last sequence seen, sorted input is mostly long runs
+	# of one sequence so those skip the regex and dict lookup
+	runFrames = None
+	runPrefix = runSuffix = ''
+	runLength = runStart = runEnd = -1
+
+	for path in fileList:
+		# accept iterGetFiles output directly
+		if not isinstance(path, basestring):
+			path = getattr(path, 'path', path)
+
+		if len(path) == runLength and \
+			path.startswith(runPrefix) and path.endswith(runSuffix):
+			frameText = path[runStart:runEnd]
+			if frameText.isdigit():
+				runFrames.append(frameText)
+				continue
+
+		match = _collapseFrameRegex.match(path)
+		if not match:
+			if not imageSequencesOnly:
+				entries.append(path)
+			continue
+
+		runPrefix, frameText, runSuffix = match.groups()
+		key = (runPrefix, len(frameText), runSuffix)
+		runFrames = sequences.get(key)
+		if runFrames is None:
+			runFrames = sequences[key] = []
+			entries.append(key)
+		runFrames.append(frameText)
+		runLength = len(path)
+		runStart = len(runPrefix)
+		runEnd = runLength - len(runSuffix)
+
+	# sequences sort by their first frame's path
+	def sortPath(entry):
+		if isinstance(entry, tuple):
+			return entry[0] + min(sequences[entry]) + entry[2]
+		return entry
+	entries.sort(key=sortPath)
+
 	collapsedList = []
+	for entry in entries:
+		if not isinstance(entry, tuple):
+			collapsedList.append(entry)
+			continue
 
-	i = 0
-	# New Logic to rename sequential files in QList
-	# [abc_xyz.1001.png, abc_xyz.1002.png]
-	while i < len(fileList):
-		# [abc_xyz][1001][png]
-		fileSections = fileList[i].split('.')
+		prefix, padding, suffix = entry
+		frames = map(int, sequences[entry])
+		frames.sort()
+		paddedPath = prefix + '%0' + str(padding) + 'd' + suffix
+		for first, last in getFrameSpans(frames):
+			collapsedList.append(paddedPath + ' %d-%d' % (first, last))
 
-		# check if name is not an image sequence
-		if len(fileSections) <= 2:
-			if not imageSequencesOnly:
-				collapsedList.append(fileList[i])
-			i += 1
-		else:
-			try:
-				# check if second last piece is a number or not
-				int(fileSections[-2])
+	return collapsedList
 
 
-				# leftFileSection = [abc_xyz]
-				leftFileSection = fileSections[0]
+class _ListdirEntry(object):
+	'''
+	Stand-in for os.DirEntry when scandir isn't available, also
+	used by DirCache to hold listings with their types resolved.
+
+	Without resolved types is_dir() and is_symlink() stat the entry,
+	which is what python 2 does unless the scandir backport is
+	installed.
+	'''
+	__slots__ = ('name', 'path', '_isDir', '_isSymlink')
 
-				# rightFileSection = [png]
-				rightFileSection = fileSections[2]
+	def __init__(self, root, name, isDir=None, isSymlink=None):
+		self.name = name
+		self.path = os.path.join(root, name)
+		self._isDir = isDir
+		self._isSymlink = isSymlink
 
-				j = i
+	def is_dir(self):
+		if self._isDir is None:
+			return os.path.isdir(self.path)
+		return self._isDir
 
-				# keep incrementing second loop till left and right sections are the same
-				while j < len(fileList) and \
-					leftFileSection == fileSections[0] and \
-					rightFileSection == fileSections[2]:
-					j += 1
-					try:
-						# [abc_xyz][1002][png]
-						newFilePieces = fileList[j].split('.')
+	def is_file(self):
+		if self._isDir is None:
+			return os.path.isfile(self.path)
+		return not self._isDir
 
-						# [abc_xyz]
-						leftFileSection = newFilePieces[0]
+	def is_symlink(self):
+		if self._isSymlink is None:
+			return os.path.islink(self.path)
+		return self._isSymlink
 
-						# [png]
-						rightFileSection = newFilePieces[2]
-					except IndexError:
-						pass
+	def stat(self):
+		return os.stat(self.path)
 
-				lastFrame = j
-				collapsedList.append(fileSections[0] +
-									'.%0' + str(len(fileSections[1])) + 'd.' +
-									fileSections[2] + ' ' +
-									str(int(fileSections[-2])) + '-' +
-									str(int(fileSections[-2]) + lastFrame - i - 1))
-				i = j
+class FileEntry(object):
+	'''
+	DirEntry-like record yielded by iterGetFiles(entries=True).
+	path is the normalized path getFiles would return, size and
+	mtime come from the scanned entry's stat, fetched on first use.
+	'''
+	__slots__ = ('path', 'name', '_entry', '_isDir', '_stat')
 
-			except ValueError:
-				collapsedList.append(fileList[i])
-				i += 1
+	def __init__(self, path, entry, isDir):
+		self.path = path
+		self.name = entry.name
+		self._entry = entry
+		self._isDir = isDir
+		self._stat = None
 
-	return collapsedList
+	def __repr__(self):
+		return '<FileEntry %r>' % self.path
+
+	def is_dir(self):
+		return self._isDir
+
+	def is_file(self):
+		return not self._isDir
+
+	def is_symlink(self):
+		return _isSymlinkEntry(self._entry)
+
+	def stat(self):
+		if self._stat is None:
+			self._stat = self._entry.stat()
+		return self._stat
+
+	@property
+	def size(self):
+		return self.stat().st_size
+
+	@property
+	def mtime(self):
+		return self.stat().st_mtime
+
+def _scanDir(path):
+	'''
+	Returns DirEntry-like objects for everything directly under path.
+	Uses scandir when available so file types come straight from the
+	directory listing rather than a stat per entry.  On python 2 that
+	needs the optional scandir backport, otherwise every entry is
+	stat'ed.
+
+	Goes through the DirCache when one is enabled.
+	'''
+	if _dirCache:
+		return _dirCache.scan(path)
+	return _scanDirUncached(path)
+
+def _scanDirUncached(path):
+	if _osScandir:
+		return _osScandir(path)
+	return [_ListdirEntry(path, name) for name in os.listdir(path)]
+
+def _isDirEntry(entry):
+	try:
+		return entry.is_dir()
+	except OSError:
+		return False
+
+def _isSymlinkEntry(entry):
+	try:
+		return entry.is_symlink()
+	except OSError:
+		return False
+
+class DirCache(object):
+	'''
+	LRU cache of directory listings, keyed by normalized absolute
+	path.  A directory's mtime is checked before its cached listing
+	is reused, so adding, removing or renaming entries invalidates it.
+
+	Only names and types are cached, stat() on a cached entry
+	still reads fresh size and mtime.
+
+	Turn on for every cOS scanning function with enableDirCache().
+	'''
+	# listings taken this close to the directory's mtime aren't
+	# trusted, a change in the same mtime tick wouldn't show up
+	racyWindow = 2.0
+
+	def __init__(self, maxEntries=4096):
+		self.maxEntries = maxEntries
+		self.hits = 0
+		self.misses = 0
+		self._listings = collections.OrderedDict()
+		self._lock = threading.Lock()
 
+	def __len__(self):
+		return len(self._listings)
+
+	def __nonzero__(self):
+		return True
+
+	__bool__ = __nonzero__
+
+	def _key(self, path):
+		return ensureEndingSlash(os.path.abspath(path))
+
+	def scan(self, path):
+		'''
+		Returns the entries in path, from the cache if the
+		directory hasn't changed since it was listed.
+		'''
+		# entries are built from the key, not the caller's path,
+		# so they stay right for relative paths and after a chdir
+		key = self._key(path)
+		try:
+			mtime = os.stat(key).st_mtime
+		except OSError:
+			self.invalidate(path)
+			raise
+
+		with self._lock:
+			cached = self._listings.pop(key, None)
+			if cached and cached[0] == mtime and \
+				cached[1] - mtime > self.racyWindow:
+				# re-insert to mark it most recently used
+				self._listings[key] = cached
+				self.hits += 1
+				return list(cached[2])
+			self.misses += 1
+
+		listedAt = time.time()
+		dirEntries = []
+		for entry in _scanDirUncached(key):
+			dirEntries.append(_ListdirEntry(key, entry.name,
+				_isDirEntry(entry),
+				_isSymlinkEntry(entry)))
+
+		with self._lock:
+			self._listings[key] = (mtime, listedAt, dirEntries)
+			self._trim()
+		return list(dirEntries)
+
+	def _trim(self):
+		while len(self._listings) > self.maxEntries:
+			self._listings.popitem(last=False)
+
+	def setMaxEntries(self, maxEntries):
+		'''
+		Changes the size limit, evicting the least recently
+		used listings if the cache is over it.
+		'''
+		with self._lock:
+			self.maxEntries = maxEntries
+			self._trim()
+
+	def invalidate(self, path=None):
+		'''
+		Drops the cached listing for path, or everything if
+		no path is given.
+		'''
+		with self._lock:
+			if path is None:
+				self._listings.clear()
+			else:
+				self._listings.pop(self._key(path), None)
+
+	def clear(self):
+		'''
+		Drops every listing and resets the hit / miss counters.
+		'''
+		with self._lock:
+			self._listings.clear()
+			self.hits = 0
+			self.misses = 0
+
+_dirCache = None
+
+def enableDirCache(maxEntries=4096):
+	'''
+	Turns on the shared DirCache for this process and returns it.
+	'''
+	global _dirCache
+	if not _dirCache:
+		_dirCache = DirCache(maxEntries)
+	else:
+		_dirCache.setMaxEntries(maxEntries)
+	return _dirCache
+
+def disableDirCache():
+	global _dirCache
+	_dirCache = None
+
+def getDirCache():
+	'''
+	Returns the shared DirCache or None if it isn't enabled.
+	'''
+	return _dirCache
+
+def _globToRegex(pattern):
+	regex = fnmatch.translate(pattern)
+	# python 2 tacks global flags on the end, which
+	# can't sit in the middle of an alternation
+	if regex.endswith('(?ms)'):
+		regex = regex[:-len('(?ms)')]
+	return regex
+
+class PathMatcher(object):
+	'''
+	A getFiles include / exclude list compiled once.
+
+	Globs (patterns with an *) are merged into a single alternation
+	and every pattern is also merged into one substring search,
+	matching getFiles' "in"-style checks.  With regex=True each
+	pattern is compiled once and matched against the full path and
+	the name.
+	'''
+	def __init__(self, patterns, regex=False):
+		self.patterns = tuple(patterns)
+		self.regex = regex
+		self._regexes = []
+		self._globs = None
+		self._substrings = None
+
+		if regex:
+			self._regexes = [re.compile(p) for p in self.patterns]
+			return
+
+		globs = [p for p in self.patterns if '*' in p]
+		if globs:
+			self._globs = re.compile(
+				'|'.join(['(?:%s)' % _globToRegex(os.path.normcase(p)) for p in globs]),
+				re.S | re.M)
+		if self.patterns:
+			self._substrings = re.compile(
+				'|'.join([re.escape(p) for p in self.patterns]))
+
+	def __nonzero__(self):
+		return len(self.patterns) > 0
+
+	__bool__ = __nonzero__
+
+	def matches(self, name, fullPath):
+		'''
+		Returns whether the name or full path matches any pattern.
+		'''
+		if self.regex:
+			for pattern in self._regexes:
+				if pattern.match(fullPath) or pattern.match(name):
+					return True
+			return False
+
+		if self._substrings and self._substrings.search(fullPath):
+			return True
+		if self._globs:
+			# fnmatch compares normcased paths,
+			# a no-op everywhere but windows
+			fullPath = os.path.normcase(fullPath)
+			name = os.path.normcase(name)
+			return bool(self._globs.match(fullPath) or self._globs.match(name))
+		return False
+
+_pathMatchers = collections.OrderedDict()
+_pathMatchersLock = threading.Lock()
+_maxPathMatchers = 256
+
+def getPathMatcher(patterns, regex=False):
+	'''
+	Returns a compiled PathMatcher for a list of patterns.
+	Matchers are cached by pattern list so repeated getFiles
+	calls with the same filters only compile them once, the
+	least recently used ones are dropped past _maxPathMatchers.
+
+	A PathMatcher passed in is returned as is, it keeps the
+	regex setting it was built with and regex is ignored.
+	'''
+	if isinstance(patterns, PathMatcher):
+		return patterns
+
+	key = (tuple(ensureArray(patterns)) if patterns else (), bool(regex))
+	with _pathMatchersLock:
+		matcher = _pathMatchers.pop(key, None)
+		if matcher is not None:
+			# re-insert to mark it most recently used
+			_pathMatchers[key] = matcher
+			return matcher
+
+	matcher = PathMatcher(key[0], regex)
+	with _pathMatchersLock:
+		_pathMatchers[key] = matcher
+		while len(_pathMatchers) > _maxPathMatchers:
+			_pathMatchers.popitem(last=False)
+	return matcher
 
 # def getDirs(path):
 # 	return getFiles(path, fileExcludes=['*'], depth=0)
@@ -1137,109 +3192,440 @@ def getFiles(path,
 		depth=-1,
 		filesOnly=False,
 		fullPath=True,
-		regex=False):
+		regex=False,
+		parallel=False,
+		workers=None,
+		sort=False,
+		followLinks=False):
 	'''
 	if the folder or file include/exclude lists have an *
 	getFiles() will use wildcard matching, otherwise it will
 	use simple "in"-style matching
 
+	Include/exclude lists can also be PathMatchers from
+	getPathMatcher, which skips compiling them again.  A
+	PathMatcher keeps its own regex setting, regex only
+	applies to the plain lists.
+
+	parallel, workers, sort and followLinks are passed to
+	iterGetFiles, see there for the parallel walk.
+
 	Ex:
 
 	'''
+	if not os.path.isdir(path):
+		print 'folder not found:', path
+		return []
 
-	if fileIncludes:
-		fileIncludes = ensureArray(fileIncludes)
-	if folderIncludes:
-		folderIncludes = ensureArray(folderIncludes)
-	if fileExcludes:
-		fileExcludes = ensureArray(fileExcludes)
-	if folderExcludes:
-		folderExcludes = ensureArray(folderExcludes)
-
-	def pathMatches(pattern, path, fullPath):
-		return (not regex and \
-					('*' in pattern and \
-						(fnmatch.fnmatch(fullPath, pattern) or \
-						fnmatch.fnmatch(path, pattern))) or \
-						pattern in fullPath) or \
-				(regex and \
-					(re.match(pattern, fullPath) or \
-					re.match(pattern, path)))
-
-	def shouldInclude(path, root, isDir=False):
-		fullPath = unixPath(os.path.join(root, path))
-
-		if fileIncludes and not isDir:
-			for pattern in fileIncludes:
-				if pathMatches(pattern, path, fullPath):
-					return True
-			if not includeAfterExclude:
-				return False
+	return list(iterGetFiles(path,
+		fileIncludes=fileIncludes,
+		folderIncludes=folderIncludes,
+		fileExcludes=fileExcludes,
+		folderExcludes=folderExcludes,
+		includeAfterExclude=includeAfterExclude,
+		depth=depth,
+		filesOnly=filesOnly,
+		fullPath=fullPath,
+		regex=regex,
+		parallel=parallel,
+		workers=workers,
+		sort=sort,
+		followLinks=followLinks))
+
+def iterGetFiles(path,
+		fileIncludes=[],
+		folderIncludes=[],
+		fileExcludes=[],
+		folderExcludes=[],
+		includeAfterExclude=False,
+		depth=-1,
+		filesOnly=False,
+		fullPath=True,
+		regex=False,
+		entries=False,
+		parallel=False,
+		workers=None,
+		sort=False,
+		followLinks=False,
+		pool=None):
+	'''
+	Generator version of getFiles, takes the same arguments and
+	yields matches as each directory is listed so callers can
+	stop early or handle huge trees in constant memory.
+
+	With entries=True yields FileEntry records instead of paths,
+	which carry size and mtime from the directory scan.
+
+	parallel=True lists directories concurrently on a pool of
+	workers threads (numberOfProcesses() by default), which hides
+	the per-listing latency of network filesystems.  Results then
+	arrive in completion order, use sort=True for sorted output.
+	Pass a ThreadPool as pool to list on it instead of a new one,
+	it's left running for the caller.
+
+	Symlinked directories are listed but not descended into unless
+	followLinks, same as os.walk there's no guard against link loops.
+	'''
+	fileIncludes = getPathMatcher(fileIncludes, regex)
+	folderIncludes = getPathMatcher(folderIncludes, regex)
+	fileExcludes = getPathMatcher(fileExcludes, regex)
+	folderExcludes = getPathMatcher(folderExcludes, regex)
 
-		if folderIncludes and isDir:
-			for pattern in folderIncludes:
-				if pathMatches(pattern, path, fullPath):
-					return True
+	def shouldInclude(path, fullPath, isDir=False):
+		if isDir:
+			includes = folderIncludes
+			excludes = folderExcludes
+		else:
+			includes = fileIncludes
+			excludes = fileExcludes
+
+		if includes:
+			if includes.matches(path, fullPath):
+				return True
 			if not includeAfterExclude:
 				return False
 
-		if isDir:
-			for pattern in folderExcludes:
-				if pathMatches(pattern, path, fullPath):
-					return False
+		return not excludes.matches(path, fullPath)
+
+	def result(filepath, entry, isDir):
+		if not fullPath:
+			filepath = filepath.replace(path, '')
+		if entries:
+			return FileEntry(filepath, entry, isDir)
+		return filepath
+
+	def scan(root, level):
+		'''
+		Lists a single directory, returning its results and
+		the child directories to scan next.
+		'''
+		rootPrefix = root if root.endswith('/') else root + '/'
+		results = []
+		children = []
+		try:
+			dirEntries = list(_scanDir(root))
+		except OSError:
+			return results, children
+
+		files = []
+		for entry in dirEntries:
+			filepath = rootPrefix + entry.name
+			if _isDirEntry(entry):
+				if shouldInclude(entry.name, filepath, True):
+					if not filesOnly:
+						results.append(result(filepath, entry, True))
+					# prune on depth before descending, and only follow
+					# symlinks with followLinks, same as os.walk
+					if (depth < 0 or level < depth) and \
+						(followLinks or not _isSymlinkEntry(entry)):
+						children.append((filepath, level + 1))
+			elif shouldInclude(entry.name, filepath, False):
+				files.append(result(filepath, entry, False))
+
+		# dirs first then files, same as getFiles always has
+		results.extend(files)
+		return results, children
+
+	if not os.path.isdir(path):
+		return
+
+	# only the top needs normalizing, every path below
+	# it is built from already normalized parts
+	top = unixPath(path.rstrip(os.sep) or os.sep)
+
+	if parallel:
+		walk = _walkParallel(scan, top, workers, pool)
+	else:
+		walk = _walkSerial(scan, top)
+
+	if sort:
+		if entries:
+			walk = sorted(walk, key=lambda e: e.path)
 		else:
-			for pattern in fileExcludes:
-				if pathMatches(pattern, path, fullPath):
-					return False
+			walk = sorted(walk)
+
+	for found in walk:
+		yield found
+
+def _walkSerial(scan, top):
+	# depth first, same order as os.walk
+	stack = [(top, 0)]
+	while stack:
+		results, children = scan(*stack.pop())
+		# reversed so they pop off in listing order
+		stack.extend(reversed(children))
+		for found in results:
+			yield found
+
+def _walkParallel(scan, top, workers=None, pool=None):
+	'''
+	Runs scan over the tree on a bounded thread pool.  Each listing
+	queues its children as soon as it finishes so sibling and cousin
+	directories are all listed concurrently.
 
-		return True
+	A pool that's passed in is shared, not terminated.
+	'''
+	from multiprocessing.pool import ThreadPool
 
-# custom walk method with depth
-# link for reference: http://stackoverflow.com/questions/229186/os-walk-without-digging-into-directories-below
-	def walkLevel(directory, depth=-1):
-		directory = directory.rstrip(os.path.sep)
-		assert os.path.isdir(directory)
-		numSeperators = directory.count(os.path.sep)
-		for root, dirs, files in os.walk(directory):
-			dirs[:] = [d for d in dirs if shouldInclude(d, root, True)]
-			yield root, dirs, files
-			currentSeperators = root.count(os.path.sep)
-			if depth > -1:
-				if numSeperators + depth <= currentSeperators:
-					del dirs[:]
-
-	if fileIncludes:
-		fileIncludes = ensureArray(fileIncludes)
-	if folderIncludes:
-		folderIncludes = ensureArray(folderIncludes)
-	if fileExcludes:
-		fileExcludes = ensureArray(fileExcludes)
-	if folderExcludes:
-		folderExcludes = ensureArray(folderExcludes)
+	ownPool = pool is None
+	if ownPool:
+		if not workers:
+			workers = numberOfProcesses()
+		pool = ThreadPool(workers)
+	done = Queue.Queue()
 
+	def scanInto(root, level):
+		try:
+			done.put(scan(root, level))
+		except Exception:
+			# every scan has to report back
+			# or the pending count never drains
+			done.put(([], []))
+
+	pending = 1
+	pool.apply_async(scanInto, (top, 0))
 	try:
-		allFiles = []
-		for root, dirs, files in walkLevel(path, depth):
-			for d in dirs:
-				filepath = unixPath(os.path.join(root, d))
-				if not filesOnly and shouldInclude(d, root, True):
-					if fullPath:
-						allFiles.append(filepath)
-					else:
-						allFiles.append(filepath.replace(path, ''))
+		while pending:
+			results, children = done.get()
+			pending -= 1
+			for child in children:
+				pending += 1
+				pool.apply_async(scanInto, child)
+			for found in results:
+				yield found
+	finally:
+		if ownPool:
+			pool.terminate()
+			pool.join()
+
+# Trash
+##################################################
+# dot prefixed so trash folders are hidden, ex: .cOSTrash_a1b2c3
+_trashPrefix = '.cOSTrash_'
+
+class TrashReaper(object):
+	'''
+	Deletes folders in the background.  trash() renames a folder
+	into a hidden sibling, which is instant as it's on the same
+	filesystem, and a single daemon thread removes the queued
+	folders one at a time.
+
+	pending is the number of folders queued or being deleted,
+	removed and filesRemoved count what's been deleted so far.
+
+	bytesPending is the size of the files known to be waiting to be
+	deleted, measured without walking anything twice: files moved
+	by trashContents() are counted as they're moved, and everything
+	else as removeTree lists it.  It drops as files are deleted.  A
+	folder moved whole by trash() adds nothing until the reaper
+	starts on it.
+
+	failed holds {trashDir: error} for the latest maxFailed
+	folders that couldn't be fully deleted.
+
+	Call drain() before exiting to finish outstanding deletes, the
+	thread is a daemon so it won't hold the process open otherwise.
 
-			for f in files:
-				filepath = unixPath(os.path.join(root, f))
-				if shouldInclude(f, root, False):
-					if fullPath:
-						allFiles.append(filepath)
+	Parameters:
+		maxPending - trash() blocks once this many folders are queued
+		workers - threads removeTree uses for each folder
+		maxFailed - most failures to keep in failed
+	'''
+	def __init__(self, maxPending=1024, workers=2, maxFailed=100):
+		self.workers = workers
+		self.maxFailed = maxFailed
+		self.removed = 0
+		self.filesRemoved = 0
+		self.bytesPending = 0
+		self.failed = collections.OrderedDict()
+		# {trashDir: (names, bytes)} of files already in bytesPending
+		self._counted = {}
+		self._queue = Queue.Queue(maxPending)
+		self._lock = threading.Lock()
+		self._thread = None
+
+	def __len__(self):
+		return self.pending
+
+	def __nonzero__(self):
+		return True
+
+	__bool__ = __nonzero__
+
+	@property
+	def pending(self):
+		return self._queue.unfinished_tasks
+
+	def trash(self, path):
+		'''
+		Moves path into a new hidden trash folder next to it and
+		queues that for deletion.  Returns the trash folder.
+		Raises OSError if path can't be moved.
+		'''
+		path = unixPath(os.path.abspath(path))
+		trashDir = unixPath(tempfile.mkdtemp(prefix=_trashPrefix, dir=os.path.dirname(path)))
+		try:
+			os.rename(path, os.path.join(trashDir, os.path.basename(path)))
+		except OSError:
+			os.rmdir(trashDir)
+			raise
+		self.put(trashDir)
+		return trashDir
+
+	def trashContents(self, folder, onlyFiles=False):
+		'''
+		Moves everything in folder into a new hidden trash folder
+		next to it and queues that for deletion.  Returns the trash
+		folder, or None if there was nothing to move.  Entries that
+		can't be moved are left in place.
+
+		With onlyFiles only files directly in folder are moved.
+		'''
+		folder = unixPath(os.path.abspath(folder))
+		# list first so a missing folder doesn't leave a trash dir
+		entries = [entry for entry in _scanDir(folder)
+			if not (onlyFiles and _isDirEntry(entry) and not _isSymlinkEntry(entry))]
+		if not entries:
+			return None
+
+		trashDir = unixPath(tempfile.mkdtemp(prefix=_trashPrefix, dir=os.path.dirname(folder)))
+		counted = set()
+		size = 0
+		try:
+			for entry in entries:
+				try:
+					# already listed, so files are
+					# counted here rather than walked again
+					entrySize = 0
+					if not _isDirEntry(entry) and not _isSymlinkEntry(entry):
+						entrySize = entry.stat().st_size
+					os.rename(os.path.join(folder, entry.name),
+						os.path.join(trashDir, entry.name))
+				except OSError:
+					continue
+				counted.add(entry.name)
+				size += entrySize
+		finally:
+			if not counted:
+				os.rmdir(trashDir)
+				trashDir = None
+			else:
+				with self._lock:
+					self.bytesPending += size
+					self._counted[trashDir] = (counted, size)
+				self.put(trashDir)
+		return trashDir
+
+	def collectTrash(self, folder):
+		'''
+		Queues trash folders left in folder by a process that
+		exited before they were deleted.  Returns how many.
+		'''
+		count = 0
+		for entry in _scanDir(folder):
+			if entry.name.startswith(_trashPrefix) and _isDirEntry(entry):
+				self.put(unixPath(entry.path))
+				count += 1
+		return count
+
+	def put(self, trashDir):
+		'''
+		Queues an already trashed folder for deletion.
+		'''
+		self._queue.put(trashDir)
+		with self._lock:
+			if not self._thread or not self._thread.is_alive():
+				self._thread = threading.Thread(target=self._reap)
+				self._thread.daemon = True
+				self._thread.start()
+
+	def _reap(self):
+		while True:
+			trashDir = self._queue.get()
+			with self._lock:
+				counted, countedSize = self._counted.pop(trashDir, ((), 0))
+			# what this folder still has in bytesPending
+			outstanding = [countedSize]
+
+			def progress(path, size, removed):
+				if removed:
+					size = -size
+				else:
+					parent, slash, name = path.rpartition('/')
+					# already counted when it was moved
+					if parent == trashDir and name in counted:
+						return
+				with self._lock:
+					self.bytesPending += size
+					outstanding[0] += size
+
+			try:
+				summary = removeTree(trashDir, workers=self.workers, progress=progress)
+				with self._lock:
+					self.filesRemoved += summary['files']
+					if summary['success']:
+						self.removed += 1
+					elif summary['error']:
+						self._addFailed(trashDir, summary['error'])
 					else:
-						allFiles.append(filepath.replace(path, ''))
+						# just the first, a whole tree of
+						# errors would pile up on a farm node
+						self._addFailed(trashDir,
+							sorted(summary['failed'].items())[0][1])
+			except Exception as err:
+				with self._lock:
+					self._addFailed(trashDir, err)
+			finally:
+				# whatever couldn't be deleted isn't pending anymore
+				with self._lock:
+					self.bytesPending -= outstanding[0]
+				self._queue.task_done()
+
+	def _addFailed(self, trashDir, error):
+		self.failed.pop(trashDir, None)
+		self.failed[trashDir] = error
+		while len(self.failed) > self.maxFailed:
+			self.failed.popitem(last=False)
+
+	def drain(self, timeout=None):
+		'''
+		Waits for every queued folder to be deleted, returns False
+		if timeout seconds pass first.
+		'''
+		deadline = time.time() + timeout if timeout is not None else None
+		allDone = self._queue.all_tasks_done
+		with allDone:
+			while self._queue.unfinished_tasks:
+				if deadline is None:
+					# wait with a timeout so ctrl+c still works
+					allDone.wait(1.0)
+					continue
+				remaining = deadline - time.time()
+				if remaining <= 0:
+					return False
+				allDone.wait(remaining)
+		return True
 
-		return allFiles
-	except:
-		print 'folder not found:', path
-		return []
+_trashReaper = None
+_trashReaperLock = threading.Lock()
+
+def getTrashReaper():
+	'''
+	Returns the shared TrashReaper, starting one if needed.
+	'''
+	global _trashReaper
+	with _trashReaperLock:
+		if not _trashReaper:
+			_trashReaper = TrashReaper()
+		return _trashReaper
+
+def drainTrash(timeout=None):
+	'''
+	Waits for background deletes to finish, see TrashReaper.drain.
+	'''
+	if not _trashReaper:
+		return True
+	return _trashReaper.drain(timeout)
 
 # Processes
 ##################################################
@@ -1301,14 +3687,298 @@ def runPython(pythonFile):
 	'''
 	return os.system('python ' + pythonFile)
 
+class OutputBuffer(object):
+	'''
+	Keeps the tail of a stream's output in a preallocated byte ring,
+	holding at most maxLines lines and maxBytes bytes.  Old output is
+	dropped a whole line at a time so what's kept always starts at a
+	line, unless a single line is longer than maxBytes.
+
+	Appending copies just the new data, nothing already
+	kept is moved or re-sliced.
+
+	Parameters:
+		maxBytes - most bytes to keep
+		maxLines - most lines to keep, None for no limit
+		spillPath - also write the full, untrimmed output to this file
+	'''
+	def __init__(self, maxBytes=1024 * 1024, maxLines=None, spillPath=None):
+		self.maxBytes = maxBytes
+		self.maxLines = maxLines
+		self.spillPath = spillPath
+		self.size = 0
+		self.totalBytes = 0
+		self.totalLines = 0
+		self._ring = bytearray(maxBytes)
+		self._end = 0
+		# lengths of the complete lines kept, oldest first,
+		# and of the unfinished line after them
+		self._lineLengths = collections.deque()
+		self._partialLength = 0
+		self._spillFile = open(spillPath, 'ab') if spillPath else None
+
+	def __len__(self):
+		return self.size
+
+	def __str__(self):
+		return self.getvalue()
+
+	@property
+	def lines(self):
+		'''
+		Number of lines kept, counting an unfinished last line.
+		'''
+		return len(self._lineLengths) + (1 if self._partialLength else 0)
+
+	def write(self, data):
+		if not data:
+			return
+		if self._spillFile:
+			self._spillFile.write(data)
+		self.totalBytes += len(data)
+
+		pieces = data.split('\n')
+		if len(pieces) > 1:
+			self.totalLines += len(pieces) - 1
+			self._lineLengths.append(self._partialLength + len(pieces[0]) + 1)
+			self._lineLengths.extend(len(piece) + 1 for piece in pieces[1:-1])
+			self._partialLength = len(pieces[-1])
+		else:
+			self._partialLength += len(data)
+		self.size += len(data)
+		self._trim()
+
+		# only the part of data that's still kept goes in the ring
+		kept = min(len(data), self.size)
+		if kept < len(data):
+			data = data[-kept:]
+		end = self._end + kept
+		if end <= self.maxBytes:
+			self._ring[self._end:end] = data
+		else:
+			split = self.maxBytes - self._end
+			self._ring[self._end:] = data[:split]
+			self._ring[:kept - split] = data[split:]
+		self._end = end % self.maxBytes
+
+	def _trim(self):
+		lineLengths = self._lineLengths
+		if self.maxLines:
+			while lineLengths and self.lines > self.maxLines:
+				self.size -= lineLengths.popleft()
+		while self.size > self.maxBytes and \
+			(len(lineLengths) > 1 or (lineLengths and self._partialLength)):
+			self.size -= lineLengths.popleft()
+
+		# one line that doesn't fit on its own keeps its end
+		if self.size > self.maxBytes:
+			if lineLengths:
+				lineLengths[0] -= self.size - self.maxBytes
+			else:
+				self._partialLength -= self.size - self.maxBytes
+			self.size = self.maxBytes
+
+	def getvalue(self):
+		'''
+		Returns the output that's been kept.
+		'''
+		start = self._end - self.size
+		if start >= 0:
+			return str(self._ring[start:self._end])
+		return str(self._ring[start:]) + str(self._ring[:self._end])
+
+	def close(self):
+		'''
+		Closes the spill file, if there is one.
+		'''
+		if self._spillFile:
+			self._spillFile.close()
+			self._spillFile = None
+
+class OutputPump(object):
+	'''
+	Reads output pipes in chunks as data arrives, waiting on all of
+	them at once with poll or select rather than a thread per pipe.
+	Windows can't select on pipes, so there each pipe gets one
+	reader thread feeding a shared queue.
+
+	Parameters:
+		streams - {name: file}, ex: {'out': process.stdout}, None's are skipped
+		chunkSize - most bytes read from a pipe at a time
+	'''
+	def __init__(self, streams=None, chunkSize=65536):
+		self.chunkSize = chunkSize
+		# fd -> (name, stream)
+		self._open = {}
+		self._fds = {}
+
+		self._poll = None
+		self._queue = None
+		if isWindows():
+			self._queue = Queue.Queue()
+		elif hasattr(select, 'poll'):
+			self._poll = select.poll()
+
+		for name, stream in (streams or {}).items():
+			self.add(name, stream)
+
+	@property
+	def done(self):
+		'''
+		True once every pipe has been read to the end.
+		'''
+		return not self._open
+
+	def add(self, name, stream):
+		'''
+		Starts reading stream, its output comes back from read()
+		under name.  Names can be anything hashable.
+		'''
+		if not stream:
+			return
+		fd = stream.fileno()
+		self._open[fd] = (name, stream)
+		self._fds[name] = fd
+		if self._queue:
+			thread = threading.Thread(target=self._readInto, args=(fd, stream))
+			thread.daemon = True
+			thread.start()
+		elif self._poll:
+			self._poll.register(fd, select.POLLIN | select.POLLPRI)
+
+	def isOpen(self, name):
+		return name in self._fds
+
+	def remove(self, name):
+		'''
+		Stops reading name and closes its pipe.
+		'''
+		if name in self._fds:
+			self._close(self._fds[name])
+
+	def _readInto(self, fd, stream):
+		while True:
+			try:
+				data = os.read(fd, self.chunkSize)
+			except OSError:
+				data = ''
+			self._queue.put((fd, stream, data))
+			if not data:
+				return
+
+	def _close(self, fd):
+		name, stream = self._open.pop(fd)
+		del self._fds[name]
+		if self._poll:
+			self._poll.unregister(fd)
+		try:
+			stream.close()
+		except (IOError, OSError):
+			pass
+
+	def _waitForReady(self, timeout):
+		'''
+		Returns [(fd, stream, data)] for the pipes with something to read.
+		'''
+		if self._queue:
+			try:
+				ready = [self._queue.get(timeout=timeout)]
+			except Queue.Empty:
+				return []
+			while True:
+				try:
+					ready.append(self._queue.get_nowait())
+				except Queue.Empty:
+					return ready
+
+		try:
+			if self._poll:
+				fds = [fd for fd, event in self._poll.poll(
+					None if timeout is None else int(timeout * 1000))]
+			else:
+				fds = select.select(list(self._open), [], [], timeout)[0]
+		except (select.error, OSError, IOError) as err:
+			# interrupted by a signal, the caller will just try again
+			if err.args[0] != errno.EINTR:
+				raise
+			return []
+
+		ready = []
+		for fd in fds:
+			stream = self._open[fd][1]
+			try:
+				ready.append((fd, stream, os.read(fd, self.chunkSize)))
+			except OSError as err:
+				if err.errno not in (errno.EINTR, errno.EAGAIN):
+					ready.append((fd, stream, ''))
+		return ready
+
+	def read(self, timeout=None):
+		'''
+		Waits up to timeout seconds for output from any pipe.
+		Returns {name: data} with whatever arrived, which is empty
+		if nothing did.  A pipe that hits its end is closed.
+		'''
+		if not self._open:
+			return {}
+		chunks = {}
+		for fd, stream, data in self._waitForReady(timeout):
+			# skip pipes that have since been removed, the
+			# fd could even belong to a newer pipe by now
+			if self._open.get(fd, (None, None))[1] is not stream:
+				continue
+			if data:
+				chunks.setdefault(self._open[fd][0], []).append(data)
+			else:
+				self._close(fd)
+		return dict((name, ''.join(data)) for name, data in chunks.items())
+
+def _takeLines(chunks, partials, buffers, maxPartial, final=False):
+	'''
+	Moves the complete lines in chunks, plus any held partial lines,
+	into buffers, returning them as (newOut, newErr).  Whatever's
+	after the last newline is held in partials unless final.
+	'''
+	lines = []
+	for name in ('out', 'err'):
+		data = partials[name] + chunks.get(name, '')
+		end = len(data) if final else data.rfind('\n') + 1
+		# don't hold on to a huge line forever, ex: \r progress bars
+		if len(data) - end > maxPartial:
+			end = len(data)
+		partials[name] = data[end:]
+		buffers[name].write(data[:end])
+		lines.append(data[:end])
+	return lines
+
 def waitOnProcess(process,
 	checkInFunc=False,
 	checkErrorFunc=False,
 	timeout=False,
 	loggingFunc=False,
 	checkInInterval=10,
-	outputBufferLength=10000):
+	outputBufferLength=10000,
+	outputBufferBytes=1024 * 1024,
+	outLogPath=None,
+	errLogPath=None):
+	'''
+	Pumps a process's output until it exits, handing new output to
+	loggingFunc and checkErrorFunc and calling checkInFunc(out, err)
+	every checkInInterval seconds.  Waits on the pipes between
+	check ins rather than polling.  checkErrorFunc only ever sees
+	stderr it hasn't seen before.
 
+	Returns (out, err), the last outputBufferLength lines of each,
+	or (False, reason) if the check in failed or it timed out.
+
+	Parameters:
+		process - psutil.Popen, ex: from startSubprocess
+		timeout - minutes to give the process
+		outputBufferLength - lines of out and err to keep
+		outputBufferBytes - most bytes of out and err to keep
+		outLogPath - write the full stdout here as well
+		errLogPath - write the full stderr here as well
+	'''
 	if not loggingFunc:
 		def loggingFunc(*args):
 			print ' '.join([str(arg) for arg in args])
@@ -1321,12 +3991,6 @@ def waitOnProcess(process,
 		def checkErrorFunc(*args):
 			return True
 
-	def queueOutput(out, outQueue):
-		if out:
-			for line in iter(out.readline, ''):
-				outQueue.put(line)
-			out.close()
-
 	def checkProcess(process):
 		if not process.is_running():
 			print 'Process stopped'
@@ -1336,97 +4000,102 @@ def waitOnProcess(process,
 			return process.status() != psutil.STATUS_ZOMBIE
 		return True
 
-	def getQueueContents(queue, printContents=True):
-		contents = ''
-		lines = 0
-		maxLines = 500
-		while not queue.empty() and lines < maxLines:
-			line = queue.get_nowait()
-			contents += line
-			if printContents:
-				# remove the newline at the end
-				print line[:-1]
-			lines += 1
-
-		if lines >= maxLines:
-			print '\n\n\nbailed on getting the rest of the queue'
-			queue.queue.clear()
-		return contents
-
-	lastUpdate = 0
-
-	out = newOut = ''
-	err = newErr = ''
-
-	processStartTime = int(time.time())
-
-	# threads dies with the program
-	outQueue = Queue.Queue()
-	processThread = threading.Thread(target=queueOutput, args=(process.stdout, outQueue))
-	processThread.daemon = True
-	processThread.start()
-
-	errQueue = Queue.Queue()
-	errProcessThread = threading.Thread(target=queueOutput, args=(process.stderr, errQueue))
-	errProcessThread.daemon = True
-	errProcessThread.start()
-
-	while checkProcess(process):
-		newOut = getQueueContents(outQueue, printContents=False)
-		newErr = getQueueContents(errQueue, printContents=False)
-		out += newOut
-		err += newErr
-
-		# remove starting and trailing whitespace
-		newErr = newErr.strip()
+	buffers = {
+		'out': OutputBuffer(outputBufferBytes, outputBufferLength, outLogPath),
+		'err': OutputBuffer(outputBufferBytes, outputBufferLength, errLogPath),
+	}
+	# output after the last newline, held until the line is done
+	partials = {'out': '', 'err': ''}
 
-		if newOut:
-			loggingFunc(newOut[:-1])
-		if newErr:
-			if checkErrorFunc:
-				checkErrorFunc(newErr)
-			else:
-				loggingFunc('\n\nError:')
-				loggingFunc(newErr)
-				loggingFunc('\n')
-
-		# check in to see how we're doing
-		if time.time() > lastUpdate + checkInInterval:
-			# only keep the last 10,000 lines of log
-			out = out[-outputBufferLength:]
-			err = err[-outputBufferLength:]
-
-			lastUpdate = time.time()
-			if checkInFunc and not checkInFunc(out, err):
-				try:
-					process.kill()
-				except:
-					loggingFunc('Could not kill, please forcefully close the executing program')
-				return (False, 'Check in failed')
+	def takeLines(chunks, final=False):
+		return _takeLines(chunks, partials, buffers, outputBufferBytes, final)
 
-			# if we've been rendering longer than the time alotted, bail
-			processTime = (int(time.time()) - processStartTime) / 60.0
-			if timeout and processTime >= timeout:
-				loggingFunc('Process timed out.  Total process time: %.2f min' % processTime)
-				return (False, 'timed out')
+	def logOutput(newOut):
+		# remove the newline at the end
+		if newOut.endswith('\n'):
+			newOut = newOut[:-1]
+		loggingFunc(newOut)
 
-	# call wait to kill the zombie process on *nix systems
-	process.wait()
+	try:
+		lastUpdate = 0
+		processStartTime = int(time.time())
+		pump = OutputPump({'out': process.stdout, 'err': process.stderr})
+
+		while checkProcess(process):
+			untilCheckIn = max(lastUpdate + checkInInterval - time.time(), 0)
+			if pump.done:
+				# nothing left to read, just wait for it to exit
+				try:
+					process.wait(timeout=untilCheckIn)
+				except psutil.TimeoutExpired:
+					pass
+				chunks = {}
+			else:
+				chunks = pump.read(untilCheckIn)
 
-	sys.stdout.flush()
-	sys.stderr.flush()
+			newOut, newErr = takeLines(chunks)
 
-	newOut = getQueueContents(outQueue, printContents=False)
-	newErr = getQueueContents(errQueue, printContents=False)
-	out += newOut
-	err += newErr
+			# remove starting and trailing whitespace
+			newErr = newErr.strip()
 
-	if newOut:
-		loggingFunc(newOut[:-1])
-	if newErr and checkErrorFunc:
-		checkErrorFunc(err)
+			if newOut:
+				logOutput(newOut)
+			if newErr:
+				if checkErrorFunc:
+					checkErrorFunc(newErr)
+				else:
+					loggingFunc('\n\nError:')
+					loggingFunc(newErr)
+					loggingFunc('\n')
+
+			# check in to see how we're doing
+			if time.time() >= lastUpdate + checkInInterval:
+				lastUpdate = time.time()
+				if checkInFunc and not checkInFunc(
+						buffers['out'].getvalue(),
+						buffers['err'].getvalue()):
+					try:
+						process.kill()
+					except:
+						loggingFunc('Could not kill, please forcefully close the executing program')
+					return (False, 'Check in failed')
+
+				# if we've been rendering longer than the time alotted, bail
+				processTime = (int(time.time()) - processStartTime) / 60.0
+				if timeout and processTime >= timeout:
+					loggingFunc('Process timed out.  Total process time: %.2f min' % processTime)
+					return (False, 'timed out')
+
+		# call wait to kill the zombie process on *nix systems
+		process.wait()
+
+		sys.stdout.flush()
+		sys.stderr.flush()
+
+		# whatever was still sitting in the pipes
+		newErrs = []
+		while not pump.done:
+			chunks = pump.read(0)
+			if not chunks:
+				break
+			newOut, newErr = takeLines(chunks)
+			if newOut:
+				logOutput(newOut)
+			newErrs.append(newErr)
+		newOut, newErr = takeLines({}, final=True)
 
-	return (out, err)
+		if newOut:
+			logOutput(newOut)
+		out = buffers['out'].getvalue()
+		err = buffers['err'].getvalue()
+		newErr = (''.join(newErrs) + newErr).strip()
+		if newErr and checkErrorFunc:
+			checkErrorFunc(newErr)
+
+		return (out, err)
+	finally:
+		buffers['out'].close()
+		buffers['err'].close()
 
 def startSubprocess(processArgs, env=None, shell=False):
 	"""Runs a program through psutil.Popen, disabling Windows error dialogs"""
@@ -1510,6 +4179,261 @@ def startSubprocess(processArgs, env=None, shell=False):
 		shell=shell,
 		creationflags=subprocess_flags)
 
+class SupervisedProcess(object):
+	'''
+	A process run by a ProcessSupervisor.  result is None until it's
+	done, then (out, err) like waitOnProcess, or (False, reason) if
+	a check in failed or it timed out.
+
+	Once it's done its output buffers are released, getOutput()
+	returns the (out, err) that was kept when it finished.
+	'''
+	def __init__(self, process, checkInFunc=False, checkErrorFunc=False, timeout=False,
+			outputBufferLength=10000, outputBufferBytes=1024 * 1024):
+		self.process = process
+		self.checkInFunc = checkInFunc
+		self.checkErrorFunc = checkErrorFunc
+		self.timeout = timeout
+		self.startTime = time.time()
+		self.lastUpdate = 0
+		self.result = None
+		self.exited = False
+		self.buffers = {
+			'out': OutputBuffer(outputBufferBytes, outputBufferLength),
+			'err': OutputBuffer(outputBufferBytes, outputBufferLength),
+		}
+		self.partials = {'out': '', 'err': ''}
+		self.output = None
+
+	def __repr__(self):
+		return '<SupervisedProcess %s>' % self.pid
+
+	@property
+	def pid(self):
+		return self.process.pid
+
+	@property
+	def done(self):
+		return self.result is not None
+
+	def getOutput(self):
+		'''
+		Returns (out, err) kept so far.
+		'''
+		if self.buffers is None:
+			return self.output
+		return (self.buffers['out'].getvalue(), self.buffers['err'].getvalue())
+
+	def release(self):
+		'''
+		Keeps just the output text, freeing the preallocated buffers.
+		'''
+		if self.buffers is None:
+			return
+		self.output = self.getOutput()
+		for buf in self.buffers.values():
+			buf.close()
+		self.buffers = None
+		self.partials = None
+
+class ProcessSupervisor(object):
+	'''
+	Runs the waitOnProcess loop for many processes from a single
+	thread.  Every pipe of every process is waited on by one
+	OutputPump, so the thread sleeps until some process writes
+	or one of them is due a check in.
+
+	python 2 has no asyncio, so iterOutput() stands in for async
+	iteration, each step is one wait across every process, ex:
+
+		supervisor = ProcessSupervisor()
+		supervisor.start(['render', 'shot.ma'], checkInFunc=checkIn)
+		for supervised, kind, data in supervisor.iterOutput():
+			print supervised.pid, kind, data
+
+	kind is out or err for new lines of output, or exit when the
+	process is done, with its result as data.
+
+	Finished processes are dropped from running, the supervisor
+	only holds on to processes that are still going.
+
+	Parameters:
+		checkInInterval - seconds between each process's check ins
+		outputBufferLength - lines of out and err kept per process
+		outputBufferBytes - most bytes of out and err kept per process
+	'''
+	# how often to check on processes that have closed
+	# their pipes but haven't exited yet
+	exitPollInterval = 0.1
+
+	def __init__(self, checkInInterval=10, outputBufferLength=10000, outputBufferBytes=1024 * 1024):
+		self.checkInInterval = checkInInterval
+		self.outputBufferLength = outputBufferLength
+		self.outputBufferBytes = outputBufferBytes
+		self.running = []
+		self._pump = OutputPump()
+
+	def __len__(self):
+		return len(self.running)
+
+	def __nonzero__(self):
+		return True
+
+	__bool__ = __nonzero__
+
+	def start(self, processArgs, env=None, shell=False,
+			checkInFunc=False, checkErrorFunc=False, timeout=False):
+		'''
+		Starts a process with startSubprocess and supervises it,
+		returns its SupervisedProcess.
+
+		checkInFunc, checkErrorFunc and timeout work as in waitOnProcess
+		but a process that times out is killed.
+		'''
+		process = startSubprocess(processArgs, env=env, shell=shell)
+		return self.add(process,
+			checkInFunc=checkInFunc,
+			checkErrorFunc=checkErrorFunc,
+			timeout=timeout)
+
+	def add(self, process, checkInFunc=False, checkErrorFunc=False, timeout=False):
+		'''
+		Supervises an already started process, it needs stdout and
+		stderr pipes.  Returns its SupervisedProcess.
+		'''
+		supervised = SupervisedProcess(process,
+			checkInFunc=checkInFunc,
+			checkErrorFunc=checkErrorFunc,
+			timeout=timeout,
+			outputBufferLength=self.outputBufferLength,
+			outputBufferBytes=self.outputBufferBytes)
+		self._pump.add((supervised, 'out'), process.stdout)
+		self._pump.add((supervised, 'err'), process.stderr)
+		self.running.append(supervised)
+		return supervised
+
+	def _pipesOpen(self, supervised):
+		return self._pump.isOpen((supervised, 'out')) or \
+			self._pump.isOpen((supervised, 'err'))
+
+	def step(self, timeout=None):
+		'''
+		Waits for output until timeout or the next check in is due,
+		then handles it.  Returns a list of (supervised, kind, data)
+		events, see iterOutput.
+		'''
+		running = self.running
+		if not running:
+			return []
+
+		wait = min(p.lastUpdate for p in running) + self.checkInInterval - time.time()
+		if timeout is not None:
+			wait = min(wait, timeout)
+		for supervised in running:
+			if supervised.exited:
+				wait = 0
+				break
+			if not self._pipesOpen(supervised):
+				wait = min(wait, self.exitPollInterval)
+		wait = max(wait, 0)
+
+		# {supervised: {name: data}}
+		chunks = {}
+		if self._pump.done:
+			time.sleep(wait)
+		else:
+			for (supervised, name), data in self._pump.read(wait).items():
+				chunks.setdefault(supervised, {})[name] = data
+
+		events = []
+		for supervised in running:
+			events.extend(self._update(supervised, chunks.get(supervised, {})))
+		if any(event[1] == 'exit' for event in events):
+			self.running = [p for p in running if not p.done]
+		return events
+
+	def _takeOutput(self, supervised, chunks, final=False):
+		events = []
+		newOut, newErr = _takeLines(chunks,
+			supervised.partials,
+			supervised.buffers,
+			self.outputBufferBytes,
+			final)
+		if newOut:
+			events.append((supervised, 'out', newOut))
+		if newErr:
+			events.append((supervised, 'err', newErr))
+			# remove starting and trailing whitespace
+			newErr = newErr.strip()
+			if newErr and supervised.checkErrorFunc:
+				supervised.checkErrorFunc(newErr)
+		return events
+
+	def _finish(self, supervised, result):
+		self._pump.remove((supervised, 'out'))
+		self._pump.remove((supervised, 'err'))
+		supervised.result = result
+		supervised.release()
+		return (supervised, 'exit', result)
+
+	def _kill(self, supervised, reason):
+		try:
+			supervised.process.kill()
+			supervised.process.wait()
+		except Exception:
+			pass
+		return self._finish(supervised, (False, reason))
+
+	def _update(self, supervised, chunks):
+		events = self._takeOutput(supervised, chunks)
+		now = time.time()
+		checkIn = now >= supervised.lastUpdate + self.checkInInterval
+		pipesOpen = self._pipesOpen(supervised)
+
+		# only look for an exit once the pipes close or at a check in,
+		# that's a syscall per process otherwise
+		if supervised.exited or \
+			((not pipesOpen or checkIn) and supervised.process.poll() is not None):
+			if pipesOpen and not supervised.exited:
+				# one more pass for whatever's still in the pipes
+				supervised.exited = True
+				return events
+			events.extend(self._takeOutput(supervised, {}, final=True))
+			events.append(self._finish(supervised, supervised.getOutput()))
+			return events
+
+		if checkIn:
+			supervised.lastUpdate = now
+			if supervised.checkInFunc and \
+				not supervised.checkInFunc(*supervised.getOutput()):
+				events.append(self._kill(supervised, 'Check in failed'))
+				return events
+
+			processTime = (now - supervised.startTime) / 60.0
+			if supervised.timeout and processTime >= supervised.timeout:
+				events.append(self._kill(supervised, 'timed out'))
+		return events
+
+	def iterOutput(self):
+		'''
+		Supervises until every process is done,
+		yielding each event as it happens.
+		'''
+		while self.running:
+			for event in self.step():
+				yield event
+
+	def run(self):
+		'''
+		Supervises until every process is done, returns the result
+		of each one running when it was called, in the order they
+		were added.
+		'''
+		supervised = list(self.running)
+		for event in self.iterOutput():
+			pass
+		return [p.result for p in supervised]
+
 def getCmdline(proc):
 	if isWindows():
 		return proc.cmdline
@@ -1646,7 +4570,7 @@ def findCaseInsensitiveFilename(path, mustExist=False):
 				print searchRoot, 'not a directory'
 			break
 
-		files = os.listdir(searchRoot)
+		files = [entry.name for entry in _scanDir(searchRoot)]
 		for f in files:
 			# print 'checking:', f, fileOrFolderToMatch
 			if f.lower() == fileOrFolderToMatch:
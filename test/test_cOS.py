@@ -1,6 +1,11 @@
 
 import os
+import errno
+import shutil
+import multiprocessing.pool
+import struct
 import subprocess
+import threading
 
 import arkInit
 arkInit.init()
@@ -9,6 +14,21 @@ import tryout
 import cOS
 
 
+def makeEXRData():
+	'''
+	Returns a minimal uncompressed 4x2 single channel scanline exr
+	'''
+	def attr(name, attrType, value):
+		return name + '\0' + attrType + '\0' + struct.pack('<i', len(value)) + value
+	header = struct.pack('<ii', 20000630, 2) + \
+		attr('channels', 'chlist', 'R\0' + struct.pack('<iB3xii', 1, 0, 1, 1) + '\0') + \
+		attr('compression', 'compression', '\0') + \
+		attr('dataWindow', 'box2i', struct.pack('<iiii', 0, 0, 3, 1)) + '\0'
+	chunks = [struct.pack('<ii', y, 8) + '\0' * 8 for y in range(2)]
+	offsets = struct.pack('<QQ', len(header) + 16, len(header) + 16 + len(chunks[0]))
+	return header + offsets + ''.join(chunks)
+
+
 class test(tryout.TestSuite):
 	title = 'test/cOS.py'
 
@@ -59,6 +79,46 @@ class test(tryout.TestSuite):
 		ver = cOS.getVersion('sandbox/file.mb')
 		self.assertEqual(ver, 0)
 
+	def versionIndex(self):
+		open('sandbox/shot_v0002_abc.mb', 'w')
+		open('sandbox/shot_v0010_xyz.mb', 'w')
+		open('sandbox/shot_v0003.ma', 'w')
+		open('sandbox/.shot_v0099.mb', 'w')
+		index = cOS.VersionIndex('sandbox')
+
+		self.assertEqual(index.getHighestVersionFilePath('shot', 'mb'),
+			cOS.normalizeDir('sandbox') + 'shot_v0010_xyz.mb')
+		self.assertEqual(index.getHighestVersion('shot_v0002_abc', '.mb').initials, 'xyz')
+		self.assertEqual([f.version for f in index.getVersions('shot', 'mb')], [2, 10])
+		self.assertEqual(index.getNextVersion('shot', 'ma'), 4)
+		self.assertEqual(index.getNextVersion('missing', 'mb'), 1)
+		self.assertEqual(index.getHighestVersionFilePath('file', 'mb'),
+			cOS.getHighestVersionFilePath('sandbox', 'file', 'mb'))
+
+		# just scanned, so inside the racy window refresh always rescans
+		open('sandbox/shot_v0011.mb', 'w')
+		self.assertTrue(index.refresh())
+		self.assertEqual(index.getNextVersion('shot', 'mb'), 12)
+		index.scannedAt += index.racyWindow + 1
+		self.assertFalse(index.refresh())
+
+	def reserveNextVersion(self):
+		open('sandbox/asset_v0004_abc.mb', 'w')
+		path = cOS.reserveNextVersion('sandbox', 'asset_v0004_abc', 'mb')
+		self.assertEqual(path, cOS.normalizeDir('sandbox') + 'asset_v0005.mb')
+		self.assertTrue(os.path.isfile(path))
+
+		paths = []
+		def reserve():
+			paths.append(cOS.reserveNextVersion('sandbox', 'asset', '.mb'))
+		threads = [threading.Thread(target=reserve) for i in range(20)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(len(set(paths)), 20)
+		self.assertEqual(cOS.VersionIndex('sandbox').getNextVersion('asset', 'mb'), 26)
+
 	def incrementVersion(self):
 		ver = cOS.incrementVersion('sandbox/file_v001.mb')
 		self.assertEqual(cOS.getVersion(ver), 2)
@@ -85,6 +145,30 @@ class test(tryout.TestSuite):
 		self.assertEqual(info['relativePath'], './test-cOS/four.js')
 		self.assertEqual(info['filebase'], 'test/test-cOS/four')
 
+	def pathInfo(self):
+		info = cOS.getPathInfo('test\\test-cOS\\four.bgeo.sc')
+		self.assertTrue(isinstance(info, cOS.PathInfo))
+		self.assertTrue(cOS.getPathInfo('test\\test-cOS\\four.bgeo.sc') is info)
+		self.assertEqual(info['extension'], 'bgeo.sc')
+		self.assertEqual(info.name, 'four')
+		self.assertEqual(info.get('dirname'), 'test/test-cOS/')
+		self.assertEqual(info.toDict(), {
+			'path': 'test/test-cOS/four.bgeo.sc',
+			'dirname': 'test/test-cOS/',
+			'basename': 'four.bgeo.sc',
+			'extension': 'bgeo.sc',
+			'name': 'four',
+			'filebase': 'test/test-cOS/four',
+			'root': 'test/',
+		})
+		self.assertEqual(info, info.toDict())
+
+		copied = cOS.getPathInfo('test\\test-cOS\\four.bgeo.sc', copy=True)
+		self.assertTrue(isinstance(copied, dict))
+		self.assertEqual(copied, info.toDict())
+		copied['name'] = 'five'
+		self.assertEqual(info['name'], 'four')
+
 	def removeExtension(self):
 		stripped = cOS.removeExtension('sandbox/file_v001.mb')
 		self.assertEqual(stripped, 'sandbox/file_v001')
@@ -97,6 +181,25 @@ class test(tryout.TestSuite):
 		prepped = cOS.unixPath('\\sandbox\\file_v001.mb')
 		self.assertEqual(prepped, '/sandbox/file_v001.mb')
 
+	def unixPathFastPath(self):
+		path = 'r:/show/seq/shot/frame.1001.exr'
+		self.assertTrue(cOS.unixPath(path) is path)
+		url = 'http://server/show/frame.1001.exr'
+		self.assertTrue(cOS.unixPath(url) is url)
+		self.assertEqual(cOS.unixPath('R:/show//seq'), 'r:/show/seq')
+		self.assertEqual(cOS.unixPath('http://server//show'), 'http://server/show')
+
+	def unixPaths(self):
+		paths = [
+			'\\sandbox\\file_v001.mb',
+			'C:/some//path/',
+			'http://some//url',
+			'already/normal.mb',
+		]
+		self.assertEqual(cOS.unixPaths(paths), [cOS.unixPath(p) for p in paths])
+		self.assertEqual(cOS.unixPaths(iter(['a/b', 'c/d'])), ['a/b', 'c/d'])
+		self.assertEqual(cOS.normalizeDirs(['C:\\dir', 'some/dir/']), ['c:/dir/', 'some/dir/'])
+
 	def ensureEndingSlash(self):
 		normalized = cOS.ensureEndingSlash('path/to/dir')
 		self.assertEqual(normalized, 'path/to/dir/')
@@ -111,6 +214,75 @@ class test(tryout.TestSuite):
 		self.assertTrue('file2' in dir2Files)
 		self.assertTrue('file3' in dir2Files)
 
+	def syncDir(self):
+		with open('sandbox/sandboxSubdir/file1.txt', 'w') as f:
+			f.write('data')
+		report = cOS.syncDir('sandbox', 'sandboxCopy', dryRun=True)
+		self.assertTrue('sandboxSubdir' in report['dirs'])
+		self.assertTrue('sandboxSubdir/file1.txt' in report['copied'])
+		self.assertFalse(os.path.exists('sandboxCopy'))
+
+		updates = []
+		report = cOS.syncDir('sandbox', 'sandboxCopy', workers=4, progress=updates.append)
+		self.assertTrue(report['success'])
+		self.assertEqual(report['bytes'], 4)
+		self.assertEqual(updates[-1]['files'], updates[-1]['totalFiles'])
+		self.assertEqual(len(updates), len(report['copied']))
+		self.assertEqual(open('sandboxCopy/sandboxSubdir/file1.txt').read(), 'data')
+
+		report = cOS.syncDir('sandbox', 'sandboxCopy')
+		self.assertEqual(report['copied'], [])
+
+		# same size and mtime but different content only shows up by hash
+		with open('sandboxCopy/sandboxSubdir/file1.txt', 'w') as f:
+			f.write('diff')
+		mtime = os.path.getmtime('sandbox/sandboxSubdir/file1.txt')
+		os.utime('sandboxCopy/sandboxSubdir/file1.txt', (mtime, mtime))
+		self.assertEqual(cOS.syncDir('sandbox', 'sandboxCopy')['copied'], [])
+		report = cOS.syncDir('sandbox', 'sandboxCopy', checkHash=True)
+		self.assertEqual(report['copied'], ['sandboxSubdir/file1.txt'])
+		os.system('rm -rf sandboxCopy')
+
+	def copyTree(self):
+		os.mkdir('sandbox/linked')
+		with open('sandbox/linked/file.txt', 'w') as f:
+			f.write('data')
+		os.mkdir('sandbox/tree')
+		open('sandbox/tree/keep.mb', 'w')
+		open('sandbox/tree/skip.tmp', 'w')
+		os.symlink(os.path.abspath('sandbox/linked'), 'sandbox/tree/link')
+
+		# links are followed and their contents copied
+		cOS.copyTree('sandbox/tree', 'sandbox/treeCopy')
+		self.assertTrue(not os.path.islink('sandbox/treeCopy/link'))
+		self.assertEqual(open('sandbox/treeCopy/link/file.txt').read(), 'data')
+		self.assertTrue(os.path.isfile('sandbox/treeCopy/skip.tmp'))
+
+		cOS.copyTree('sandbox/tree', 'sandbox/treeLinks',
+			symlinks=True,
+			ignore=shutil.ignore_patterns('*.tmp'))
+		self.assertTrue(os.path.islink('sandbox/treeLinks/link'))
+		self.assertTrue(os.path.isfile('sandbox/treeLinks/keep.mb'))
+		self.assertTrue(not os.path.exists('sandbox/treeLinks/skip.tmp'))
+
+		# ignored folders aren't copied or descended into
+		report = cOS.copyTree('sandbox/tree', 'sandbox/treeIgnored',
+			ignore=shutil.ignore_patterns('link'))
+		self.assertTrue(not os.path.exists('sandbox/treeIgnored/link'))
+		self.assertEqual(sorted(report['copied']), ['keep.mb', 'skip.tmp'])
+
+		# a dangling link can't be copied, the rest still is
+		os.symlink(os.path.abspath('sandbox/nothing'), 'sandbox/tree/dangling')
+		try:
+			cOS.copyTree('sandbox/tree', 'sandbox/treeDangling')
+			self.assertTrue(False)
+		except Exception as err:
+			self.assertTrue('dangling' in str(err))
+		self.assertTrue(os.path.isfile('sandbox/treeDangling/keep.mb'))
+
+		report = cOS.duplicateDir('sandbox/tree', 'sandbox/treeDuplicate')
+		self.assertEqual(list(report['failed']), ['dangling'])
+
 	def genArgs(self):
 		args = cOS.genArgs({'k1': 'v1', 'k2' : 'v2', 'k3' : 'v3'})
 		self.assertEqual(args, '-k3 v3 -k2 v2 -k1 v1')
@@ -120,6 +292,116 @@ class test(tryout.TestSuite):
 		self.assertEqual(info['min'], 1510)
 		self.assertEqual(info['max'], 1519)
 
+		# regex characters in the name are matched literally
+		for frame in (1001, 1002):
+			open('sandbox/seq/shot (v2)+[a].%04d.exr' % frame, 'w')
+		open('sandbox/seq/shot (v2)+[a].1003.exr.bak', 'w')
+		open('sandbox/seq/shot v2+a.1004.exr', 'w')
+		info = cOS.getFrameRange('sandbox/seq/shot (v2)+[a].%04d.exr')
+		self.assertEqual(info['min'], 1001)
+		self.assertEqual(info['max'], 1002)
+		self.assertTrue(info['complete'])
+
+	def sequenceIndex(self):
+		index = cOS.SequenceIndex('sandbox/seq')
+		self.assertEqual(len(index), 2)
+
+		sequence = index.get('sandbox/seq/frame.%04d.exr')
+		self.assertEqual(sequence.min, 1510)
+		self.assertEqual(sequence.max, 1519)
+		self.assertTrue(sequence.complete)
+		self.assertTrue(1515 in sequence)
+		self.assertTrue(1520 not in sequence)
+
+		self.assertEqual(
+			index.getFrameRange('sandbox/seq/frame.%04d.exr'),
+			cOS.getFrameRange('sandbox/seq/frame.%04d.exr'))
+		self.assertEqual(index.get('sandbox/seq/missing.%04d.exr'), None)
+
+	def getMissingFrames(self):
+		os.remove('sandbox/seq/frame.1512.exr')
+		os.remove('sandbox/seq/frame.1513.exr')
+		os.remove('sandbox/seq/frame.1517.exr')
+		open('sandbox/seq/newFrame.1.exr', 'w')
+
+		report = cOS.getMissingFrames('sandbox/seq/frame.%04d.exr')
+		self.assertEqual(report['missingText'], '1512-1513,1517')
+		self.assertEqual(report['missingCount'], 3)
+		self.assertEqual(report['duplicates'], {})
+
+		report = cOS.getMissingFrames('sandbox/seq/newFrame.%04d.exr')
+		self.assertEqual(report['missingText'], '')
+		self.assertEqual(report['duplicates'],
+			{1: ['sandbox/seq/newFrame.1.exr', 'sandbox/seq/newFrame.0001.exr']})
+
+		# 1 and 01 are both unpadded frame 1
+		open('sandbox/seq/short.1.exr', 'w')
+		open('sandbox/seq/short.01.exr', 'w')
+		open('sandbox/seq/short.2.exr', 'w')
+		report = cOS.getMissingFrames('sandbox/seq/short.%d.exr')
+		self.assertEqual(report['missingCount'], 0)
+		self.assertEqual(report['duplicates'],
+			{1: ['sandbox/seq/short.1.exr', 'sandbox/seq/short.01.exr']})
+
+	def collapseFiles(self):
+		files = [
+			'render/a.b.1001.exr',
+			'render/a.b.1002.exr',
+			'render/a.b.1005.exr',
+			'render/notes.txt',
+			'sim/fluid.0001.bgeo.sc',
+			'sim/fluid.0002.bgeo.sc',
+		]
+		original = list(reversed(files))
+		unsorted = list(original)
+		collapsed = [
+			'render/a.b.%04d.exr 1001-1002',
+			'render/a.b.%04d.exr 1005-1005',
+			'render/notes.txt',
+			'sim/fluid.%04d.bgeo.sc 1-2',
+		]
+		self.assertEqual(cOS.collapseFiles(files), collapsed)
+		self.assertEqual(cOS.collapseFiles(unsorted), collapsed)
+		self.assertEqual(unsorted, original)
+		self.assertEqual(cOS.collapseFiles(iter(files), imageSequencesOnly=True),
+			[f for f in collapsed if f != 'render/notes.txt'])
+
+		entries = cOS.iterGetFiles('sandbox/seq/', filesOnly=True, entries=True)
+		self.assertEqual(cOS.collapseFiles(entries),
+			['sandbox/seq/frame.%04d.exr 1510-1519',
+			'sandbox/seq/newFrame.%04d.exr 1-1'])
+
+	def syncFileSequence(self):
+		with open('sandbox/seq/frame.1510.exr', 'w') as f:
+			f.write('data')
+		src = 'sandbox/seq/frame.%04d.exr'
+		dst = 'sandbox/seqCopy/frame.%04d.exr'
+
+		report = cOS.syncFileSequence(src, dst, dryRun=True)
+		self.assertTrue(report['success'])
+		self.assertEqual(report['copied'], range(1510, 1520))
+		self.assertEqual(report['bytes'], 4)
+		self.assertFalse(os.path.exists('sandbox/seqCopy'))
+
+		report = cOS.syncFileSequence(src, dst, workers=4)
+		self.assertTrue(report['success'])
+		self.assertEqual(len(report['copied']), 10)
+		self.assertEqual(open('sandbox/seqCopy/frame.1510.exr').read(), 'data')
+		self.assertEqual(int(os.path.getmtime('sandbox/seqCopy/frame.1510.exr')),
+			int(os.path.getmtime('sandbox/seq/frame.1510.exr')))
+
+		os.remove('sandbox/seqCopy/frame.1515.exr')
+		os.remove('sandbox/seq/frame.1517.exr')
+		report = cOS.syncFileSequence(src, dst, workers=4)
+		self.assertFalse(report['success'])
+		self.assertEqual(report['copied'], [1515])
+		self.assertEqual(report['failed'], [1517])
+		self.assertEqual(len(report['skipped']), 8)
+
+		self.assertFalse(cOS.copyFileSequence(src, dst, parallel=True))
+		self.assertEqual(cOS.syncFileSequence('sandbox/seq/frame.1510.exr', dst)['error'],
+			'No frame padding in: sandbox/seq/frame.1510.exr')
+
 	def validateFrameFile(self):
 		frameText = cOS.getFirstFileFromFrameRangeText('sandbox/seq/frame.%04d.exr 1510-1519')
 		self.assertEqual(frameText, 'sandbox/seq/frame.1510.exr')
@@ -134,6 +416,57 @@ class test(tryout.TestSuite):
 		self.assertEqual(frameText, False)
 
 
+	def checkEXRQuick(self):
+		exrData = makeEXRData()
+		with open('sandbox/valid.exr', 'wb') as f:
+			f.write(exrData)
+		with open('sandbox/truncated.exr', 'wb') as f:
+			f.write(exrData[:-4])
+
+		self.assertTrue(cOS.checkEXRQuick('sandbox/valid.exr')['valid'])
+		result = cOS.checkEXRQuick('sandbox/truncated.exr')
+		self.assertTrue(not result['valid'])
+		self.assertEqual(result['scanline'], 1)
+		self.assertEqual(cOS.checkEXRQuick('sandbox/missing.exr')['error'], 'not found')
+		self.assertTrue(not cOS.isValidEXR('sandbox/file.mb', silent=True, quick=True))
+
+	def validateEXRSequence(self):
+		exrData = makeEXRData()
+		os.mkdir('sandbox/exr')
+		for frame in (1, 2, 3, 5, 6):
+			with open('sandbox/exr/beauty.%04d.exr' % frame, 'wb') as f:
+				f.write(exrData if frame != 3 else exrData[:-4])
+
+		report = cOS.validateEXRSequence('sandbox/exr/beauty.%04d.exr',
+			workers=1, quick=True)
+		self.assertTrue(not report['valid'])
+		self.assertTrue(not report['complete'])
+		self.assertEqual(report['ok'], [1, 2, 5, 6])
+		self.assertEqual(report['bad'], [3])
+		self.assertEqual(report['missing'], [4])
+		self.assertEqual(report['firstBad']['frame'], 3)
+		self.assertEqual(sorted(report['frames']), [1, 2, 3, 4, 5, 6])
+
+		# stops at the first broken frame
+		report = cOS.validateEXRSequence('sandbox/exr/beauty.%04d.exr',
+			workers=1, failFast=True, quick=True)
+		self.assertEqual(sorted(report['frames']), [1, 2, 3])
+		self.assertEqual(report['ok'], [1, 2])
+		self.assertEqual(report['bad'], [3])
+		self.assertEqual(report['missing'], [])
+
+		# isValidEXRSequence wants a complete sequence
+		with open('sandbox/exr/beauty.0004.exr', 'wb') as f:
+			f.write(exrData)
+		self.assertTrue(not cOS.isValidEXRSequence('sandbox/exr/beauty.%04d.exr',
+			silent=True, parallel=True, workers=1, quick=True))
+		with open('sandbox/exr/beauty.0003.exr', 'wb') as f:
+			f.write(exrData)
+		self.assertTrue(cOS.isValidEXRSequence('sandbox/exr/beauty.%04d.exr',
+			parallel=True, workers=1, quick=True))
+		self.assertTrue(cOS.isValidEXRSequence('sandbox/exr/beauty.%04d.exr',
+			quick=True))
+
 	def removeStartingSlash(self):
 		res = cOS.removeStartingSlash('/path/to/file')
 		self.assertEqual(res, 'path/to/file')
@@ -214,6 +547,98 @@ class test(tryout.TestSuite):
 		self.assertTrue(len(files) > 4)
 		self.assertTrue(len(files) < 40)
 
+	def getFilesDepth(self):
+		files = cOS.getFiles('sandbox', depth=0)
+		self.assertTrue('sandbox/file.mb' in files)
+		self.assertTrue('sandbox/sandboxSubdir' in files)
+		self.assertTrue('sandbox/sandboxSubdir/file1.txt' not in files)
+
+		files = cOS.getFiles('sandbox', depth=1, filesOnly=True)
+		self.assertTrue('sandbox/sandboxSubdir/file1.txt' in files)
+		self.assertTrue('sandbox/sandboxSubdir' not in files)
+
+	def getPathMatcher(self):
+		matcher = cOS.getPathMatcher(['*.exr', 'seq/'])
+		self.assertTrue(matcher.matches('frame.1001.exr', 'a/frame.1001.exr'))
+		self.assertTrue(matcher.matches('file.mb', 'a/seq/file.mb'))
+		self.assertTrue(not matcher.matches('file.mb', 'a/b/file.mb'))
+		self.assertTrue(cOS.getPathMatcher(['*.exr', 'seq/']) is matcher)
+		self.assertTrue(not cOS.getPathMatcher([]))
+
+		matcher = cOS.getPathMatcher(['frame\.\d+\.exr'], regex=True)
+		self.assertTrue(matcher.matches('frame.1001.exr', 'a/frame.1001.exr'))
+		self.assertTrue(not matcher.matches('frame.exr', 'a/frame.exr'))
+
+		files = cOS.getFiles('sandbox', fileIncludes=matcher, filesOnly=True)
+		self.assertEqual(len(files), 10)
+
+		# evicts least recently used, not everything
+		maxPathMatchers = cOS._maxPathMatchers
+		cOS._maxPathMatchers = 2
+		try:
+			first = cOS.getPathMatcher(['a'])
+			cOS.getPathMatcher(['b'])
+			self.assertTrue(cOS.getPathMatcher(['a']) is first)
+			cOS.getPathMatcher(['c'])
+			self.assertTrue(cOS.getPathMatcher(['a']) is first)
+			self.assertEqual(len(cOS._pathMatchers), 2)
+		finally:
+			cOS._maxPathMatchers = maxPathMatchers
+
+	def iterGetFiles(self):
+		files = cOS.iterGetFiles('sandbox/seq', fileIncludes='*.exr')
+		self.assertTrue(next(files).endswith('.exr'))
+
+		entries = list(cOS.iterGetFiles('sandbox', fileIncludes='*.mb', filesOnly=True, entries=True))
+		self.assertEqual(len(entries), 2)
+		self.assertEqual(entries[0].size, 0)
+		self.assertTrue(entries[0].mtime > 0)
+		self.assertTrue(entries[0].is_file())
+
+	def getFilesParallel(self):
+		serial = cOS.getFiles('sandbox', folderExcludes=['seq'], sort=True)
+		parallel = cOS.getFiles('sandbox', folderExcludes=['seq'], parallel=True, workers=4, sort=True)
+		self.assertEqual(serial, parallel)
+		self.assertEqual(serial, sorted(serial))
+
+		files = cOS.getFiles('sandbox', depth=0, filesOnly=True, parallel=True)
+		self.assertEqual(sorted(files), ['sandbox/file.mb', 'sandbox/file_v001.mb'])
+
+	def dirCache(self):
+		# backdate so the listing isn't inside the racy window
+		oldTime = os.stat('sandbox/seq').st_mtime - 100
+		os.utime('sandbox/seq', (oldTime, oldTime))
+
+		cache = cOS.enableDirCache()
+		cache.clear()
+		try:
+			cOS.getFrameRange('sandbox/seq/frame.%04d.exr')
+			info = cOS.getFrameRange('sandbox/seq/frame.%04d.exr')
+			self.assertEqual(info['max'], 1519)
+			self.assertEqual(cache.misses, 1)
+			self.assertEqual(cache.hits, 1)
+
+			cache.invalidate('sandbox/seq')
+			cOS.getFrameRange('sandbox/seq/frame.%04d.exr')
+			self.assertEqual(cache.misses, 2)
+
+			# adding a file changes the dir's mtime
+			open('sandbox/seq/frame.1520.exr', 'w')
+			info = cOS.getFrameRange('sandbox/seq/frame.%04d.exr')
+			self.assertEqual(info['max'], 1520)
+			self.assertEqual(cache.misses, 3)
+
+			# cached entries hold absolute paths
+			entries = cache.scan('sandbox/seq')
+			self.assertTrue(all(os.path.isabs(e.path) for e in entries))
+
+			cOS.getFiles('sandbox')
+			self.assertTrue(len(cache) > 2)
+			cOS.enableDirCache(maxEntries=2)
+			self.assertEqual(len(cache), 2)
+		finally:
+			cOS.disableDirCache()
+
 	def removeFile(self):
 		self.assertTrue(os.path.isfile('sandbox/file.mb'))
 		cOS.removeFile('sandbox/file.mb')
@@ -228,6 +653,211 @@ class test(tryout.TestSuite):
 		ret = cOS.removeDir('sandbox/emptyDir')
 		self.assertTrue(ret != True)
 
+	def removeTree(self):
+		os.makedirs('sandbox/tree/a/b/c')
+		for i in range(200):
+			open('sandbox/tree/a/b/c/file%d' % i, 'w')
+		open('sandbox/tree/top', 'w')
+		os.symlink(os.path.abspath('sandbox/testdir1'), 'sandbox/tree/link')
+
+		summary = cOS.removeTree('sandbox/tree', waitTime=0.000001)
+		self.assertTrue(summary['timedOut'])
+		self.assertFalse(summary['success'])
+
+		summary = cOS.removeTree('sandbox/tree', keepRoot=True, onlyFiles=True, workers=4)
+		self.assertTrue(summary['success'])
+		self.assertEqual(summary['dirs'], 0)
+		self.assertTrue(os.path.isdir('sandbox/tree/a/b/c'))
+		self.assertTrue(os.path.isfile('sandbox/testdir1/file1'))
+
+		summary = cOS.removeTree('sandbox/tree', workers=4)
+		self.assertTrue(summary['success'])
+		self.assertEqual(summary['dirs'], 4)
+		self.assertFalse(os.path.exists('sandbox/tree'))
+		self.assertTrue(cOS.removeTree('sandbox/tree')['error'])
+
+		# small trees are deleted without a pool, and with workers
+		# one pool is shared by the walk and the deletes
+		pools = []
+		ThreadPool = multiprocessing.pool.ThreadPool
+		def countPools(*args, **kwargs):
+			pools.append(args)
+			return ThreadPool(*args, **kwargs)
+		multiprocessing.pool.ThreadPool = countPools
+		try:
+			os.makedirs('sandbox/small/a')
+			open('sandbox/small/a/file', 'w')
+			self.assertTrue(cOS.removeTree('sandbox/small')['success'])
+			self.assertEqual(pools, [])
+
+			os.makedirs('sandbox/small/a')
+			open('sandbox/small/a/file', 'w')
+			self.assertTrue(cOS.removeTree('sandbox/small', workers=2)['success'])
+			self.assertEqual(pools, [(2,)])
+		finally:
+			multiprocessing.pool.ThreadPool = ThreadPool
+
+		# removeDir raises the original OSError
+		os.makedirs('sandbox/locked')
+		open('sandbox/locked/file', 'w')
+		removeFile = cOS._removeFile
+		def denied(path):
+			raise OSError(errno.EACCES, 'Permission denied', path)
+		cOS._removeFile = denied
+		try:
+			cOS.removeDir('sandbox/locked')
+			self.assertTrue(False)
+		except OSError as err:
+			self.assertEqual(err.errno, errno.EACCES)
+			self.assertEqual(err.filename, 'sandbox/locked/file')
+		finally:
+			cOS._removeFile = removeFile
+
+	def removeDirBackground(self):
+		os.makedirs('sandbox/render/a')
+		for i in range(10):
+			with open('sandbox/render/a/frame%d' % i, 'w') as f:
+				f.write('data')
+
+		filesRemoved = cOS.getTrashReaper().filesRemoved
+		self.assertTrue(cOS.removeDir('sandbox/render', background=True))
+		self.assertFalse(os.path.exists('sandbox/render'))
+		reaper = cOS.getTrashReaper()
+		self.assertTrue(cOS.drainTrash(timeout=10))
+		self.assertEqual(reaper.pending, 0)
+		self.assertEqual(reaper.filesRemoved - filesRemoved, 10)
+		self.assertEqual(reaper.failed, {})
+
+		summary = cOS.emptyDir('sandbox/testdir1', background=True)
+		self.assertTrue(summary['success'])
+		self.assertEqual(os.listdir('sandbox/testdir1'), [])
+		self.assertTrue(cOS.drainTrash(timeout=10))
+		self.assertEqual([f for f in os.listdir('sandbox') if f.startswith('.cOSTrash_')], [])
+
+		# left behind by a process that exited before draining
+		os.makedirs('sandbox/.cOSTrash_old/stale')
+		self.assertEqual(reaper.collectTrash('sandbox'), 1)
+		self.assertTrue(reaper.drain(timeout=10))
+		self.assertFalse(os.path.exists('sandbox/.cOSTrash_old'))
+
+		# only the latest failures are kept
+		reaper = cOS.TrashReaper(maxFailed=2)
+		for name in ('a', 'b', 'c'):
+			reaper.put('sandbox/missing_' + name)
+		self.assertTrue(reaper.drain(timeout=10))
+		self.assertEqual(list(reaper.failed), ['sandbox/missing_b', 'sandbox/missing_c'])
+
+		# a missing folder doesn't leave an empty trash dir behind
+		summary = cOS.emptyDir('sandbox/missing', background=True)
+		self.assertTrue(summary['error'])
+		self.assertEqual([f for f in os.listdir('sandbox') if f.startswith('.cOSTrash_')], [])
+
+		# onlyFiles moves just the top level files, folders stay
+		os.makedirs('sandbox/mixed/sub')
+		open('sandbox/mixed/top', 'w')
+		open('sandbox/mixed/sub/nested', 'w')
+		summary = cOS.emptyDir('sandbox/mixed', onlyFiles=True, background=True)
+		self.assertTrue(summary['success'])
+		self.assertEqual(summary['files'], 1)
+		self.assertEqual(os.listdir('sandbox/mixed'), ['sub'])
+		self.assertEqual(os.listdir('sandbox/mixed/sub'), [])
+		self.assertTrue(cOS.drainTrash(timeout=10))
+
+		# bytesPending counts moved files up front, the rest as
+		# they're listed, and drops back to 0 as they're deleted
+		os.makedirs('sandbox/sized/sub')
+		with open('sandbox/sized/top', 'w') as f:
+			f.write('1234')
+		with open('sandbox/sized/sub/nested', 'w') as f:
+			f.write('123456')
+		reaper = cOS.TrashReaper()
+		seen = []
+		removeTree = cOS.removeTree
+		def watch(path, **kwargs):
+			progress = kwargs['progress']
+			def watchProgress(*args):
+				progress(*args)
+				seen.append(reaper.bytesPending)
+			seen.append(reaper.bytesPending)
+			kwargs['progress'] = watchProgress
+			return removeTree(path, **kwargs)
+		cOS.removeTree = watch
+		try:
+			reaper.trashContents('sandbox/sized')
+			self.assertTrue(reaper.drain(timeout=10))
+		finally:
+			cOS.removeTree = removeTree
+		self.assertEqual(seen[0], 4)
+		self.assertEqual(max(seen), 10)
+		self.assertEqual(reaper.bytesPending, 0)
+
+	def outputBuffer(self):
+		buf = cOS.OutputBuffer(10, spillPath='sandbox/full.log')
+		for i in range(100):
+			buf.write('%d\n' % i)
+		# whole lines only, '96\n' doesn't fit
+		self.assertEqual(buf.getvalue(), '97\n98\n99\n')
+		self.assertEqual(buf.lines, 3)
+		self.assertEqual(buf.totalBytes, 290)
+		self.assertEqual(buf.totalLines, 100)
+		buf.close()
+		self.assertEqual(open('sandbox/full.log').read(),
+			''.join('%d\n' % i for i in range(100)))
+
+		buf = cOS.OutputBuffer(100, maxLines=2)
+		buf.write('one\ntwo\nthr')
+		buf.write('ee')
+		self.assertEqual(buf.getvalue(), 'two\nthree')
+		buf.write('x' * 150)
+		self.assertEqual(buf.getvalue(), 'x' * 100)
+
+	def outputPump(self):
+		process = subprocess.Popen(
+			['python', '-c', 'import sys; sys.stdout.write("out"); sys.stderr.write("err")'],
+			stdout=subprocess.PIPE,
+			stderr=subprocess.PIPE)
+		pump = cOS.OutputPump({'out': process.stdout, 'err': process.stderr})
+		received = {'out': '', 'err': ''}
+		while not pump.done:
+			for name, data in pump.read(5).items():
+				received[name] += data
+		process.wait()
+		self.assertEqual(received, {'out': 'out', 'err': 'err'})
+		self.assertEqual(pump.read(0), {})
+
+	def processSupervisor(self):
+		def spawn(code):
+			return subprocess.Popen(['python', '-c', code],
+				stdout=subprocess.PIPE,
+				stderr=subprocess.PIPE)
+
+		supervisor = cOS.ProcessSupervisor(checkInInterval=0.05)
+		errors = []
+		workers = [supervisor.add(spawn('print "frame %d"' % i)) for i in range(20)]
+		failing = supervisor.add(
+			spawn('import sys; sys.stderr.write("bad frame\\n")'),
+			checkErrorFunc=errors.append)
+		hung = supervisor.add(spawn('import time; time.sleep(30)'), timeout=0.002)
+		rejected = supervisor.add(spawn('import time; time.sleep(30)'),
+			checkInFunc=lambda out, err: False)
+
+		events = list(supervisor.iterOutput())
+		self.assertEqual(len(supervisor), 0)
+		self.assertEqual(workers[3].result, ('frame 3\n', ''))
+		self.assertTrue((workers[3], 'out', 'frame 3\n') in events)
+		self.assertEqual(failing.result, ('', 'bad frame\n'))
+		self.assertEqual(errors, ['bad frame'])
+		self.assertEqual(hung.result, (False, 'timed out'))
+		self.assertEqual(rejected.result, (False, 'Check in failed'))
+		self.assertEqual(len([e for e in events if e[1] == 'exit']), 23)
+		# finished processes aren't held on to
+		self.assertEqual(supervisor.running, [])
+		self.assertTrue(workers[3].buffers is None)
+		self.assertEqual(workers[3].getOutput(), ('frame 3\n', ''))
+
+		supervisor.add(spawn('print "again"'))
+		self.assertEqual(supervisor.run(), [('again\n', '')])
+
 	# fix: can't really test this as we don't know what the
 	# directory should be
 	# def cwd(self):
@@ -247,6 +877,18 @@ class test(tryout.TestSuite):
 		files = cOS.collectFiles('sandbox', 'mb', 'sandbox/file_v001.mb')
 		self.assertEqual(sorted(files), sorted([cOS.getPathInfo(f) for f in ['sandbox/file.mb']]))
 
+	def iterCollectFiles(self):
+		# overlapping search paths only return each file once
+		files = list(cOS.iterCollectFiles(['sandbox', 'sandbox/testdir1'], [''], []))
+		paths = [f['path'] for f in files]
+		self.assertEqual(len(paths), len(set(paths)))
+		self.assertEqual(sorted(paths), [
+			'sandbox/testdir1/file1',
+			'sandbox/testdir1/file2',
+			'sandbox/testdir1/file3',
+			'sandbox/testdir2/file1',
+		])
+
 	def collectAllFiles(self):
 		files = cOS.collectAllFiles('sandbox/testdir2')
 		self.assertEqual(sorted(files), sorted([cOS.getPathInfo(f) for f in ['sandbox/testdir2/file1']]))
@@ -267,6 +909,33 @@ class test(tryout.TestSuite):
 		self.assertTrue('hello world' in out)
 		self.assertEqual(err, False)
 
+	def parseFramePath(self):
+		info = cOS.parseFramePath('C:/Trash/abc.def.1001.bgeo.sc')
+		self.assertEqual(info['dirname'], 'C:/Trash/')
+		self.assertEqual(info['base'], 'abc.def')
+		self.assertEqual(info['frame'], 1001)
+		self.assertEqual(info['padding'], 4)
+		self.assertEqual(info['extension'], 'bgeo.sc')
+		self.assertTrue(info['isSequence'])
+
+		info = cOS.parseFramePath('C:/Trash/abc.$F6.png')
+		self.assertEqual(info['frame'], None)
+		self.assertEqual(info['padding'], 6)
+
+		self.assertTrue(not cOS.parseFramePath('C:/Trash/abc.png')['isSequence'])
+
+	def getSequenceBaseName(self):
+		self.assertEqual(cOS.getSequenceBaseName('C:/Trash/abc.def.1001.exr'), 'C:/Trash/abc.def')
+		self.assertEqual(cOS.getSequenceBaseName('C:/Trash/abc_1001.exr'), 'C:/Trash/abc')
+		self.assertEqual(cOS.getSequenceBaseName('C:/Trash/abc.####.exr', False), 'C:/Trash/abc')
+		self.assertEqual(cOS.getFrameNumber('C:/Trash/abc.def.1001.bgeo.sc'), '1001')
+		self.assertEqual(cOS.getFrameNumber('C:/Trash/abc_0042.exr'), '0042')
+		try:
+			cOS.getSequenceBaseName('C:/Trash/abc.####.exr')
+			self.assertTrue(False)
+		except IndexError:
+			pass
+
 	def normalizeFramePadding(self):
 		self.assertEqual(cOS.normalizeFramePadding('C:/Trash/abc.####.png'), 'C:/Trash/abc.%04d.png')
 		self.assertEqual(cOS.normalizeFramePadding('C:/Trash/abc.$F6.png'), 'C:/Trash/abc.%06d.png')
@@ -275,6 +944,7 @@ class test(tryout.TestSuite):
 		self.assertEqual(cOS.normalizeFramePadding('C:/Trash/abc.21.png'), 'C:/Trash/abc.%d.png')
 		self.assertEqual(cOS.normalizeFramePadding('C:/Trash/abc.p3q0#$93bhn.png'), 'C:/Trash/abc.p3q0#$93bhn.png')
 		self.assertEqual(cOS.normalizeFramePadding('C:/Trash/abc.png'), 'C:/Trash/abc.png')
+		self.assertEqual(cOS.normalizeFramePadding('C:/1001/abc.1001.png'), 'C:/1001/abc.%04d.png')
 
 if __name__ == '__main__':
 	tryout.run(test)